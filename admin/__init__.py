@@ -8,11 +8,15 @@ ABI_FILEPATH = os.path.join(SERVER_DATA_DIR, 'abi.json')
 GAS_PRICES_FILEPATH = os.path.join(SERVER_DATA_DIR, 'gas_prices.csv')
 EXPLORERS_META_DATA_PATH = os.path.join(SERVER_DATA_DIR, 'meta.json')
 SCHAIN_CONFIG_DIR_PATH = os.path.join(SERVER_DATA_DIR, 'configs')
+VERIFY_DATA_CACHE_DIR = os.path.join(SERVER_DATA_DIR, 'cache', 'verify')
+BLOBS_DIR_PATH = os.path.join(SERVER_DATA_DIR, 'blobs')
 DOCKER_COMPOSE_CONFIG_PATH = os.path.join(BLOCKSCOUT_PATH,
                                           'docker-compose',
                                           'docker-compose-skale.yml')
 DOCKER_COMPOSE_BIN_PATH = '/usr/local/bin/docker-compose'
 DUMPS_DIR_PATH = os.path.join(SERVER_DATA_DIR, 'dumps')
+SCHAINS_EVENTS_CHECKPOINT_PATH = os.path.join(SERVER_DATA_DIR, 'schains_events.json')
+ENDPOINT_DECISIONS_PATH = os.path.join(SERVER_DATA_DIR, 'endpoint_decisions.jsonl')
 
 
 HOST_DIR_PATH = os.environ.get('HOST_DIR_PATH')
@@ -24,12 +28,15 @@ BLOCKSCOUT_DATA_DIR = os.path.join(HOST_DIR_PATH, 'data', 'blockscout-data') \
 NGINX_CONFIGS_DIR = os.path.join(SERVER_DATA_DIR, 'nginx')
 EXPLORERS_NGINX_CONFIG_PATH = os.path.join(NGINX_CONFIGS_DIR, 'nginx.conf')
 STATS_NGINX_CONFIG_PATH = os.path.join(NGINX_CONFIGS_DIR, 'stats.conf')
+EXPLORERS_NGINX_CONFIGS_DIR = os.path.join(NGINX_CONFIGS_DIR, 'explorers')
+NGINX_CONTAINER_EXPLORERS_DIR = '/etc/nginx/conf.d/explorers'
 
 ENDPOINT = os.environ.get('ETH_ENDPOINT')
 ETH_API_KEY = os.environ.get('ETH_API_KEY')
 PROXY_DOMAIN_NAME = os.environ.get('PROXY_DOMAIN')
 SCHAIN_NAMES = os.environ.get('SCHAIN_NAMES')
 FROM_FIRST_BLOCK = True if os.environ.get('FROM_FIRST_BLOCK') else False
+DOCKER_EVENTS_MODE = True if os.environ.get('DOCKER_EVENTS_MODE') else False
 
 SSL_DIR_PATH = os.path.join(SERVER_DATA_DIR, 'certs')
 SSL_CRT_PATH = os.path.join(SSL_DIR_PATH, 'server.crt')
@@ -47,6 +54,51 @@ STATS_TIME_DELTA = 3600
 GAS_PRICE_REFRESHING_TIME = 86400
 COMPOSE_HTTP_TIMEOUT = 600
 
+EXPLORERS_CHECK_INTERVAL = int(
+    os.environ.get('EXPLORERS_CHECK_INTERVAL') or (600 if DOCKER_EVENTS_MODE else 60)
+)
+EXPLORERS_CHECK_WORKERS = int(os.environ.get('EXPLORERS_CHECK_WORKERS') or 8)
+SCHAIN_CHECK_TIMEOUT = int(os.environ.get('SCHAIN_CHECK_TIMEOUT') or 900)
+COMPOSE_UP_TIMEOUT = SCHAIN_CHECK_TIMEOUT
+EVENT_RECONCILE_DELAY = 3
+RPC_BATCH_SIZE = 100
+RPC_TIMEOUT = 30
+HTTP_POOL_SIZE = 16
+ENDPOINT_PROBE_TIMEOUT = 5
+ENDPOINT_PROBE_DEADLINE = 8
+ENDPOINT_PROBE_WORKERS = 16
+ENDPOINT_MAX_BLOCK_LAG = 5
+
+ENDPOINT_MONITOR = True if os.environ.get('ENDPOINT_MONITOR') else False
+ENDPOINT_MONITOR_INTERVAL = 60
+ENDPOINT_MONITOR_WINDOW = 10
+ENDPOINT_MONITOR_WORKERS = 16
+ENDPOINT_SWITCH_MARGIN = 0.5
+ENDPOINT_SWITCH_COOLDOWN = 3600
+ENDPOINT_CANDIDATES_TTL = 3600
+SCHAINS_REGISTRY_REFRESH_BLOCKS = int(os.environ.get('SCHAINS_REGISTRY_REFRESH_BLOCKS') or 100)
+
+SCHAINS_EVENTS_MODE = True if os.environ.get('SCHAINS_EVENTS_MODE') else False
+SCHAINS_EVENTS_INTERVAL = 12
+SCHAINS_EVENTS_BLOCK_RANGE = 1000
+SCHAINS_EVENTS_MAX_FAILURES = 5
+SCHAINS_REGISTRY_CONSISTENCY_BLOCKS = 7200
+NODES_INDEX_TTL = 1200
+
+VERIFIED_CONTRACTS_IMPORT = True if os.environ.get('VERIFIED_CONTRACTS_IMPORT') else False
+VERIFICATION_WORKERS = 2
+VERIFICATION_SUBMIT_WORKERS = 4
+VERIFICATION_PENDING_TTL = 3600
+VERIFICATION_DEADLINE = 300
+VERIFICATION_POLL_DELAY = 2
+VERIFICATION_MAX_POLL_DELAY = 30
+
+EXPLORER_API_CONNECT_TIMEOUT = 3
+EXPLORER_API_READ_TIMEOUT = 60
+EXPLORER_API_RETRIES = 3
+EXPLORER_API_BACKOFF = 0.5
+EXPLORER_API_CONCURRENCY = 4
+
 FLASK_APP_PORT = os.environ.get('FLASK_APP_PORT')
 FLASK_APP_HOST = os.environ.get('FLASK_APP_HOST')
 FLASK_HOST_PORT = os.environ.get('FLASK_HOST_PORT')
@@ -4,10 +4,16 @@ from functools import wraps
 from threading import Thread
 from time import sleep
 
-from admin import EXPLORERS_META_DATA_PATH, ABI_FILEPATH
-from admin.configs.meta import (create_meta_file)
+from admin import (ABI_FILEPATH, EXPLORERS_CHECK_INTERVAL,
+                   DOCKER_EVENTS_MODE, ENDPOINT_MONITOR, ENDPOINT_MONITOR_INTERVAL,
+                   SCHAINS_EVENTS_MODE, SCHAINS_EVENTS_INTERVAL, SCHAIN_NAMES)
+from admin.configs.db import init_db
 from admin.core.endpoints import get_all_names
-from admin.core.explorers import check_explorer_for_schain
+from admin.core.events import watch_container_events
+from admin.core.explorer_api import log_api_stats
+from admin.core.monitor import monitor_endpoints
+from admin.core.reconciler import reconcile_schains
+from admin.core.schains_events import watch_schains_events
 from admin.utils.logger import init_logger
 
 logger = logging.getLogger(__name__)
@@ -29,18 +35,38 @@ def daemon(delay=60):
     return actual_decorator
 
 
-@daemon()
+@daemon(delay=EXPLORERS_CHECK_INTERVAL)
 def check_explorer_status():
     schains = get_all_names()
-    for schain_name in schains:
-        check_explorer_for_schain(schain_name)
+    reconcile_schains(schains)
+    log_api_stats()
+
+
+@daemon(delay=5)
+def watch_docker_events():
+    watch_container_events()
+
+
+@daemon(delay=SCHAINS_EVENTS_INTERVAL)
+def follow_schains_events():
+    watch_schains_events()
+
+
+@daemon(delay=ENDPOINT_MONITOR_INTERVAL)
+def check_endpoints_health():
+    monitor_endpoints()
 
 
 def main():
     assert os.path.isfile(ABI_FILEPATH), "ABI not found"
-    if not os.path.isfile(EXPLORERS_META_DATA_PATH):
-        create_meta_file()
+    init_db()
 
+    if DOCKER_EVENTS_MODE:
+        Thread(target=watch_docker_events, daemon=True, name='docker-events').start()
+    if SCHAINS_EVENTS_MODE and not SCHAIN_NAMES:
+        Thread(target=follow_schains_events, daemon=True, name='schains-events').start()
+    if ENDPOINT_MONITOR:
+        Thread(target=check_endpoints_health, daemon=True, name='endpoints-monitor').start()
     Thread(target=check_explorer_status, daemon=True, name='explorers-checker').start()
     while True:
         sleep(1)
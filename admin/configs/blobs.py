@@ -0,0 +1,40 @@
+import json
+import os
+from functools import lru_cache
+from hashlib import sha256
+
+from admin import BLOBS_DIR_PATH
+
+
+def get_blob_path(blob_hash):
+    return os.path.join(BLOBS_DIR_PATH, blob_hash[:2], f'{blob_hash}.json')
+
+
+def put_blob(content):
+    """Stores JSON content once under its sha256, returns the hash"""
+    data = json.dumps(content, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    blob_hash = sha256(data).hexdigest()
+    blob_path = get_blob_path(blob_hash)
+    if not os.path.isfile(blob_path):
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        tmp_path = f'{blob_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, blob_path)
+    return blob_hash
+
+
+@lru_cache(maxsize=64)
+def get_blob(blob_hash):
+    with open(get_blob_path(blob_hash), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def to_blob_refs(data):
+    """Replaces inline values with blob hashes, values that are already hashes are kept"""
+    return {
+        key: value if isinstance(value, str) else put_blob(value)
+        for key, value in data.items()
+    }
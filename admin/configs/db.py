@@ -0,0 +1,118 @@
+import logging
+import os
+from threading import RLock
+
+from peewee import (SqliteDatabase, Model, CharField, IntegerField, BooleanField,
+                    CompositeKey)
+
+from admin import DB_FILE_PATH, EXPLORERS_META_DATA_PATH, SCHAIN_CONFIG_DIR_PATH
+from admin.utils.helper import read_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+db_init_lock = RLock()
+db_state = {
+    'initialized': False,
+    'initializing': False
+}
+
+
+class ExplorerDatabase(SqliteDatabase):
+    """Creates tables and migrates legacy files on the first connection of the process"""
+    def connect(self, reuse_if_open=False):
+        connected = super().connect(reuse_if_open=reuse_if_open)
+        init_db()
+        return connected
+
+
+db = ExplorerDatabase(DB_FILE_PATH, pragmas={
+    'journal_mode': 'wal',
+    'busy_timeout': 10000,
+    'synchronous': 'normal'
+})
+
+
+class BaseModel(Model):
+    class Meta:
+        database = db
+
+
+class Explorer(BaseModel):
+    schain_name = CharField(primary_key=True)
+    port = IntegerField(null=True)
+    db_port = IntegerField(null=True)
+    scv_port = IntegerField(null=True)
+    endpoint = CharField(null=True)
+    ws_endpoint = CharField(null=True)
+    first_block = IntegerField(null=True)
+    updated = BooleanField(default=False)
+    contracts_verified = BooleanField(default=False)
+    sync = BooleanField(default=False)
+    explorer_origin = CharField(null=True)
+
+
+class ContractVerification(BaseModel):
+    schain_name = CharField()
+    address = CharField()
+    verified = BooleanField(default=False)
+
+    class Meta:
+        primary_key = CompositeKey('schain_name', 'address')
+
+
+def migrate_meta_file():
+    """Merges meta.json into the database, keys present in the file overwrite stored values"""
+    meta = read_json(EXPLORERS_META_DATA_PATH)
+    fields = Explorer._meta.fields
+    with db.atomic():
+        for schain_name, schain_meta in meta['explorers'].items():
+            row = {key: value for key, value in schain_meta.items() if key in fields}
+            ignored = set(schain_meta) - set(row)
+            if ignored:
+                logger.warning(f'Ignoring unknown meta keys of {schain_name}: {ignored}')
+            row['schain_name'] = schain_name
+            Explorer.insert(**row).on_conflict(
+                conflict_target=[Explorer.schain_name],
+                update={fields[key]: value for key, value in row.items()}
+            ).execute()
+    os.replace(EXPLORERS_META_DATA_PATH, f'{EXPLORERS_META_DATA_PATH}.migrated')
+    logger.info(f'Merged {len(meta["explorers"])} explorers from {EXPLORERS_META_DATA_PATH}')
+
+
+def migrate_verification_status():
+    for config_file in sorted(os.listdir(SCHAIN_CONFIG_DIR_PATH)):
+        if not config_file.endswith('.json'):
+            continue
+        config_path = os.path.join(SCHAIN_CONFIG_DIR_PATH, config_file)
+        config = read_json(config_path)
+        if 'verification_status' not in config:
+            continue
+        schain_name = config_file[:-len('.json')]
+        with db.atomic():
+            for address, verified in config['verification_status'].items():
+                ContractVerification.insert(
+                    schain_name=schain_name, address=address, verified=verified
+                ).on_conflict_ignore().execute()
+        del config['verification_status']
+        write_json_atomic(config_path, config)
+        logger.info(f'Migrated verification status of {schain_name}')
+
+
+def init_db():
+    """Idempotent, runs once per process and is retried on the next connection if it fails"""
+    if db_state['initialized']:
+        return
+    with db_init_lock:
+        if db_state['initialized'] or db_state['initializing']:
+            return
+        db_state['initializing'] = True
+        try:
+            is_new_db = not db.table_exists(ContractVerification._meta.table_name)
+            db.create_tables([Explorer, ContractVerification], safe=True)
+            if os.path.isfile(EXPLORERS_META_DATA_PATH):
+                migrate_meta_file()
+            if is_new_db and os.path.isdir(SCHAIN_CONFIG_DIR_PATH):
+                migrate_verification_status()
+            db_state['initialized'] = True
+        finally:
+            db_state['initializing'] = False
@@ -1,16 +1,10 @@
 import logging
 
-from admin import EXPLORERS_META_DATA_PATH
-from admin.utils.helper import read_json, write_json
-
-logger = logging.getLogger(__name__)
+from playhouse.shortcuts import model_to_dict
 
+from admin.configs.db import db, Explorer, ContractVerification
 
-def create_meta_file():
-    empty_data = {
-        'explorers': {}
-    }
-    write_json(EXPLORERS_META_DATA_PATH, empty_data)
+logger = logging.getLogger(__name__)
 
 
 def is_schain_upgraded(schain_name):
@@ -24,30 +18,24 @@ def verified_contracts(schain_name):
 
 
 def set_schain_upgraded(schain_name):
-    meta = read_json(EXPLORERS_META_DATA_PATH)
-    schain_meta = meta['explorers'][schain_name]
-    schain_meta['updated'] = True
-    write_json(EXPLORERS_META_DATA_PATH, meta)
+    Explorer.update(updated=True).where(Explorer.schain_name == schain_name).execute()
 
 
 def update_meta_data(schain_name, port, db_port, scv_port,
                      endpoint, ws_endpoint, first_block):
     logger.info(f'Updating meta data for {schain_name}')
-    meta_data = read_json(EXPLORERS_META_DATA_PATH)
-    explorers = meta_data['explorers']
-    schain_meta = explorers.get(schain_name, {})
-    schain_meta.update({
+    schain_meta = {
         'port': port,
         'db_port': db_port,
         'scv_port': scv_port,
         'endpoint': endpoint,
         'ws_endpoint': ws_endpoint,
         'first_block': first_block
-    })
-    explorers.update({
-        schain_name: schain_meta
-    })
-    write_json(EXPLORERS_META_DATA_PATH, meta_data)
+    }
+    Explorer.insert(schain_name=schain_name, **schain_meta).on_conflict(
+        conflict_target=[Explorer.schain_name],
+        update=schain_meta
+    ).execute()
 
 
 def get_schain_endpoint(schain_name):
@@ -60,15 +48,45 @@ def get_explorer_endpoint(schain_name):
 
 
 def get_schain_meta(schain_name):
-    data = get_explorers_meta()
-    return data.get(schain_name)
+    explorer = Explorer.get_or_none(Explorer.schain_name == schain_name)
+    return model_to_dict(explorer) if explorer else None
 
 
 def set_chain_verified(schain_name):
-    data = read_json(EXPLORERS_META_DATA_PATH)
-    data['explorers'][schain_name]['contracts_verified'] = True
-    write_json(EXPLORERS_META_DATA_PATH, data)
+    Explorer.update(contracts_verified=True).where(
+        Explorer.schain_name == schain_name
+    ).execute()
 
 
 def get_explorers_meta():
-    return read_json(EXPLORERS_META_DATA_PATH)['explorers']
+    return {
+        explorer['schain_name']: explorer
+        for explorer in Explorer.select().dicts()
+    }
+
+
+def init_verification_status(schain_name, addresses):
+    with db.atomic():
+        for address in addresses:
+            ContractVerification.insert(
+                schain_name=schain_name, address=address
+            ).on_conflict_ignore().execute()
+
+
+def get_verification_status(schain_name):
+    query = ContractVerification.select().where(ContractVerification.schain_name == schain_name)
+    return {row.address: row.verified for row in query}
+
+
+def set_contract_verified(schain_name, address):
+    ContractVerification.update(verified=True).where(
+        (ContractVerification.schain_name == schain_name) &
+        (ContractVerification.address == address)
+    ).execute()
+
+
+def set_contracts_verified(schain_name, addresses):
+    ContractVerification.update(verified=True).where(
+        (ContractVerification.schain_name == schain_name) &
+        (ContractVerification.address.in_(list(addresses)))
+    ).execute()
@@ -1,9 +1,22 @@
+import logging
 import os
+from hashlib import sha256
+from threading import Lock
+
 from admin import (EXPLORERS_NGINX_CONFIG_PATH, SSL_CRT_PATH, SSL_KEY_PATH,
-                   FLASK_HOST_PORT, STATS_NGINX_CONFIG_PATH)
+                   FLASK_HOST_PORT, STATS_NGINX_CONFIG_PATH, EXPLORERS_NGINX_CONFIGS_DIR,
+                   NGINX_CONTAINER_EXPLORERS_DIR)
 import crossplane
 
-from admin.configs.meta import get_explorers_meta
+from admin.configs.meta import get_explorers_meta, get_schain_meta
+
+logger = logging.getLogger(__name__)
+
+nginx_lock = Lock()
+nginx_configs_hashes = {}
+nginx_state = {
+    'reload_needed': False
+}
 
 
 def generate_schain_nginx_config(schain_name, explorer_endpoint, ssl=False):
@@ -101,22 +114,93 @@ def generate_base_nginx_config(schain_name, explorer_endpoint):
     }
 
 
+def is_ssl_enabled():
+    return os.path.isfile(SSL_CRT_PATH) and os.path.isfile(SSL_KEY_PATH)
+
+
+def get_schain_nginx_config_path(schain_name):
+    return os.path.join(EXPLORERS_NGINX_CONFIGS_DIR, f'{schain_name}.conf')
+
+
+def get_file_hash(path):
+    with open(path, 'rb') as f:
+        return sha256(f.read()).hexdigest()
+
+
+def write_nginx_config(path, formatted_config):
+    """Writes the config only if its content changed, marks nginx for reload then"""
+    config_hash = sha256(formatted_config.encode('utf-8')).hexdigest()
+    with nginx_lock:
+        if path not in nginx_configs_hashes and os.path.isfile(path):
+            nginx_configs_hashes[path] = get_file_hash(path)
+        if nginx_configs_hashes.get(path) == config_hash:
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(formatted_config)
+        os.replace(tmp_path, path)
+        nginx_configs_hashes[path] = config_hash
+        nginx_state['reload_needed'] = True
+    logger.info(f'nginx config {path} updated')
+    return True
+
+
+def remove_nginx_config(path):
+    with nginx_lock:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        nginx_configs_hashes.pop(path, None)
+        nginx_state['reload_needed'] = True
+    logger.info(f'nginx config {path} removed')
+
+
+def mark_nginx_reload():
+    with nginx_lock:
+        nginx_state['reload_needed'] = True
+
+
+def pop_nginx_reload():
+    """Returns True once if any config changed since the previous call"""
+    with nginx_lock:
+        reload_needed = nginx_state['reload_needed']
+        nginx_state['reload_needed'] = False
+        return reload_needed
+
+
+def update_schain_nginx_config(schain_name, schain_meta=None, ssl=None):
+    schain_meta = schain_meta or get_schain_meta(schain_name)
+    if schain_meta.get('explorer_origin'):
+        explorer_endpoint = schain_meta['explorer_origin']
+    else:
+        explorer_endpoint = f'http://127.0.0.1:{schain_meta["port"]}'
+    ssl = is_ssl_enabled() if ssl is None else ssl
+    schain_config = generate_schain_nginx_config(schain_name, explorer_endpoint, ssl=ssl)
+    return write_nginx_config(
+        get_schain_nginx_config_path(schain_name), crossplane.build([schain_config])
+    )
+
+
 def regenerate_nginx_config():
+    """Brings per-chain include files in line with explorers meta, returns True on changes"""
+    os.makedirs(EXPLORERS_NGINX_CONFIGS_DIR, exist_ok=True)
+    changed = write_nginx_config(EXPLORERS_NGINX_CONFIG_PATH, crossplane.build([{
+        "directive": "include",
+        "args": [
+            f'{NGINX_CONTAINER_EXPLORERS_DIR}/*.conf'
+        ]
+    }]))
     explorers = get_explorers_meta()
-    nginx_cfg = []
+    ssl = is_ssl_enabled()
     for schain_name in explorers:
-        if explorers[schain_name].get('explorer_origin'):
-            explorer_endpoint = explorers[schain_name]['explorer_origin']
-        else:
-            explorer_endpoint = f'http://127.0.0.1:{explorers[schain_name]["port"]}'
-        if os.path.isfile(SSL_CRT_PATH) and os.path.isfile(SSL_KEY_PATH):
-            schain_config = generate_schain_nginx_config(schain_name, explorer_endpoint, ssl=True)
-        else:
-            schain_config = generate_schain_nginx_config(schain_name, explorer_endpoint)
-        nginx_cfg.append(schain_config)
-    formatted_config = crossplane.build(nginx_cfg)
-    with open(EXPLORERS_NGINX_CONFIG_PATH, 'w') as f:
-        f.write(formatted_config)
+        changed |= update_schain_nginx_config(schain_name, explorers[schain_name], ssl=ssl)
+    for config_file in os.listdir(EXPLORERS_NGINX_CONFIGS_DIR):
+        if config_file.endswith('.conf') and config_file[:-len('.conf')] not in explorers:
+            remove_nginx_config(os.path.join(EXPLORERS_NGINX_CONFIGS_DIR, config_file))
+            changed = True
+    return changed
 
 
 def generate_base_stats_nginx_config():
@@ -1,17 +1,25 @@
+import json
 import logging
 import os
+from hashlib import sha256
+from importlib.metadata import version
 from os.path import join
+from threading import Lock
 
 from etherbase_predeployed.etherbase_upgradeable_generator import EtherbaseUpgradeableGenerator
 from marionette_predeployed.marionette_generator import MarionetteGenerator
-from web3 import Web3, HTTPProvider
+from web3 import Web3
 
 from admin import (
     SCHAIN_CONFIG_DIR_PATH, PROXY_ADMIN_PREDEPLOYED_ADDRESS,
     ETHERBASE_ALLOC, SCHAIN_OWNER_ALLOC, NODE_OWNER_ALLOC,
-    HOST_SCHAIN_CONFIG_DIR_PATH
+    HOST_SCHAIN_CONFIG_DIR_PATH, VERIFY_DATA_CACHE_DIR
 )
+from admin.configs.blobs import get_blob, to_blob_refs
+from admin.configs.meta import init_verification_status
+from admin.core.batch import batch_request
 from admin.core.endpoints import get_schain_info, get_schain_endpoint
+from admin.core.providers import get_web3
 
 from etherbase_predeployed import (
     UpgradeableEtherbaseUpgradeableGenerator, ETHERBASE_ADDRESS, ETHERBASE_IMPLEMENTATION_ADDRESS
@@ -33,35 +41,63 @@ from context_predeployed import ContextGenerator, CONTEXT_ADDRESS
 from predeployed_generator.openzeppelin.proxy_admin_generator import ProxyAdminGenerator
 from ima_predeployed.generator import generate_meta
 
-from admin.utils.helper import write_json, get_schain_originator, read_json
+from admin.utils.helper import write_json_atomic, get_schain_originator, read_json
 
 logger = logging.getLogger(__name__)
 
+PREDEPLOYED_PACKAGES = (
+    'ima-predeployed',
+    'etherbase-predeployed',
+    'marionette-predeployed',
+    'filestorage-predeployed',
+    'config-controller-predeployed',
+    'multisigwallet-predeployed',
+    'predeployed-generator',
+    'context-predeployed'
+)
+
+verify_data_cache = {}
+verify_data_lock = Lock()
+
 
 def get_schain_config(schain_name):
     return read_json(join(SCHAIN_CONFIG_DIR_PATH, f'{schain_name}.json'))
 
 
+def get_verification_refs(schain_name):
+    """Returns address to verification blob hash map, moving inline data to blobs if needed"""
+    config = get_schain_config(schain_name)
+    verification_refs = to_blob_refs(config['verify'])
+    if verification_refs != config['verify']:
+        logger.info(f'Moving verification data of {schain_name} to blobs')
+        config['verify'] = verification_refs
+        write_schain_config(schain_name, config)
+    return verification_refs
+
+
+def get_verification_meta(verification_ref):
+    return get_blob(verification_ref)
+
+
 def write_schain_config(schain_name, config):
-    write_json(join(SCHAIN_CONFIG_DIR_PATH, f'{schain_name}.json'), config)
+    write_json_atomic(join(SCHAIN_CONFIG_DIR_PATH, f'{schain_name}.json'), config)
 
 
-def generate_config(schain_name):
+def generate_config(schain_name, schain_endpoint=None):
     config_path = os.path.join(SCHAIN_CONFIG_DIR_PATH, f'{schain_name}.json')
     if not os.path.exists(config_path):
         logger.info(f'Generating config for {schain_name}')
-        verification_data = generate_verify_data()
-        addresses = verification_data.keys()
-        verification_status_data = {address: False for address in addresses}
+        verification_refs = get_verify_refs()
+        addresses = verification_refs.keys()
         config = {
             'alloc': {
-                **fetch_predeployed_info(schain_name, addresses),
+                **fetch_predeployed_info(schain_name, addresses, schain_endpoint),
                 **generate_owner_accounts(schain_name)
             },
-            'verify': verification_data,
-            'verification_status': verification_status_data
+            'verify': verification_refs
         }
-        write_json(config_path, config)
+        write_json_atomic(config_path, config)
+        init_verification_status(schain_name, addresses)
     host_config_path = os.path.join(HOST_SCHAIN_CONFIG_DIR_PATH, f'{schain_name}.json')
     return host_config_path
 
@@ -113,21 +149,50 @@ def generate_verify_data():
     }
 
 
-def fetch_predeployed_info(schain_name, contract_addresses):
+def get_predeployed_versions_hash():
+    versions = {package: version(package) for package in PREDEPLOYED_PACKAGES}
+    return sha256(json.dumps(versions, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def get_verify_refs():
+    """Returns blob hashes of predeployed verification data, generated once per package versions"""
+    versions_hash = get_predeployed_versions_hash()
+    with verify_data_lock:
+        if versions_hash not in verify_data_cache:
+            cache_path = join(VERIFY_DATA_CACHE_DIR, f'{versions_hash}.json')
+            if os.path.isfile(cache_path):
+                verification_refs = to_blob_refs(read_json(cache_path))
+            else:
+                logger.info(f'Generating predeployed verification data {versions_hash}')
+                verification_refs = to_blob_refs(generate_verify_data())
+                os.makedirs(VERIFY_DATA_CACHE_DIR, exist_ok=True)
+                write_json_atomic(cache_path, verification_refs)
+            verify_data_cache[versions_hash] = verification_refs
+        return verify_data_cache[versions_hash]
+
+
+def fetch_predeployed_codes(schain_endpoint, contract_addresses):
+    """Fetches codes of all predeployed contracts with one batch request"""
+    try:
+        codes = batch_request(schain_endpoint, [
+            ('eth_getCode', [address, 'latest']) for address in contract_addresses
+        ])
+    except Exception as e:
+        logger.warning(f'Batch eth_getCode failed with {e}, falling back to sequential calls')
+        web3 = get_web3(schain_endpoint)
+        codes = [web3.eth.get_code(address).hex() for address in contract_addresses]
+    logger.info(f'Fetched {len(codes)} predeployed codes')
+    return codes
+
+
+def fetch_predeployed_info(schain_name, contract_addresses, schain_endpoint=None):
     predeployed_contracts = {}
-    schain_endpoint = get_schain_endpoint(schain_name)
-    provider = HTTPProvider(schain_endpoint)
-    web3 = Web3(provider)
-    for address in contract_addresses:
-        code = web3.eth.get_code(address).hex()
+    schain_endpoint = schain_endpoint or get_schain_endpoint(schain_name)
+    contract_addresses = list(contract_addresses)
+    codes = fetch_predeployed_codes(schain_endpoint, contract_addresses)
+    for address, code in zip(contract_addresses, codes):
         if address == ETHERBASE_ADDRESS:
             add_to_accounts(predeployed_contracts, address, balance=ETHERBASE_ALLOC, code=code)
         else:
             add_to_accounts(predeployed_contracts, address, code=code)
     return predeployed_contracts
-
-
-def set_contract_verified(schain_name, address):
-    config = get_schain_config(schain_name)
-    config['verification_status'][address] = True
-    write_schain_config(schain_name, config)
@@ -0,0 +1,58 @@
+import logging
+
+from hexbytes import HexBytes
+from web3._utils.abi import get_abi_output_types, map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+
+from admin import RPC_BATCH_SIZE, RPC_TIMEOUT
+from admin.core.providers import get_session
+
+logger = logging.getLogger(__name__)
+
+
+def batch_request(endpoint, calls):
+    """Sends (method, params) pairs as JSON-RPC batches, returns results in the same order"""
+    results = []
+    for offset in range(0, len(calls), RPC_BATCH_SIZE):
+        chunk = calls[offset:offset + RPC_BATCH_SIZE]
+        payload = [
+            {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}
+            for request_id, (method, params) in enumerate(chunk)
+        ]
+        response = get_session(endpoint).post(endpoint, json=payload, timeout=RPC_TIMEOUT).json()
+        if not isinstance(response, list):
+            raise Exception(f'Batch request to {endpoint} is not supported: {response}')
+        responses = {item.get('id'): item for item in response}
+        for request_id in range(len(chunk)):
+            item = responses.get(request_id)
+            if item is None or 'error' in item:
+                raise Exception(f'Batch request {chunk[request_id]} failed: {item}')
+            results.append(item['result'])
+    return results
+
+
+def decode_call_result(web3, contract_function, result):
+    output_types = get_abi_output_types(contract_function.abi)
+    decoded = web3.codec.decode_abi(output_types, HexBytes(result))
+    normalized = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, decoded)
+    return normalized[0] if len(normalized) == 1 else normalized
+
+
+def batch_call(contract_functions):
+    """Executes contract reads in as few round trips as possible, mirrors .call() results"""
+    if not contract_functions:
+        return []
+    web3 = contract_functions[0].web3
+    calls = [
+        ('eth_call', [{'to': func.address, 'data': func._encode_transaction_data()}, 'latest'])
+        for func in contract_functions
+    ]
+    try:
+        results = batch_request(web3.provider.endpoint_uri, calls)
+    except Exception as e:
+        logger.warning(f'Batch call failed with {e}, falling back to sequential calls')
+        return [func.call() for func in contract_functions]
+    return [
+        decode_call_result(web3, func, result)
+        for func, result in zip(contract_functions, results)
+    ]
@@ -2,7 +2,9 @@ import logging
 import docker
 import socket
 from contextlib import closing
+from threading import Event, Lock
 
+from admin.configs.meta import get_schain_meta
 from admin.utils.logger import init_logger
 
 init_logger()
@@ -14,6 +16,28 @@ CONTAINER_NOT_FOUND = 'not_found'
 EXITED_STATUS = 'exited'
 CREATED_STATUS = 'created'
 RUNNING_STATUS = 'running'
+REMOVED_STATUS = 'removed'
+
+EXPLORER_CONTAINER_PREFIXES = ('blockscout_', 'postgres_')
+EVENT_STATUSES = {
+    'create': CREATED_STATUS,
+    'start': RUNNING_STATUS,
+    'restart': RUNNING_STATUS,
+    'unpause': RUNNING_STATUS,
+    'pause': 'paused',
+    'oom': EXITED_STATUS,
+    'die': EXITED_STATUS,
+    'stop': EXITED_STATUS,
+    'destroy': REMOVED_STATUS
+}
+
+containers_cache = {}
+containers_cache_lock = Lock()
+containers_refresh_lock = Lock()
+containers_cache_filled = Event()
+containers_cache_state = {
+    'generation': 0
+}
 
 
 def is_explorer_found(schain_name):
@@ -30,38 +54,105 @@ def remove_explorer(schain_name):
     container_name = f'blockscout_{schain_name}'
     if is_container_exists(container_name):
         logger.warning(f'Removing {container_name}...')
-        return dutils.containers.get(container_name).remove(force=True)
+        try:
+            return dutils.containers.get(container_name).remove(force=True)
+        finally:
+            invalidate_containers_cache()
+
+
+def parse_host_ports(ports):
+    return {
+        f'{port["PrivatePort"]}/{port["Type"]}': str(port['PublicPort'])
+        for port in ports
+        if port.get('PublicPort')
+    }
+
+
+def refresh_containers_cache():
+    """
+    Takes a snapshot of all containers with a single list call, a snapshot listed
+    before an invalidation is dropped and taken again
+    """
+    with containers_refresh_lock:
+        while True:
+            with containers_cache_lock:
+                generation = containers_cache_state['generation']
+            containers = dutils.containers.list(all=True, sparse=True)
+            snapshot = {
+                container.attrs['Names'][0].lstrip('/'): {
+                    'status': container.attrs['State'],
+                    'ports': parse_host_ports(container.attrs.get('Ports') or [])
+                }
+                for container in containers
+            }
+            with containers_cache_lock:
+                if containers_cache_state['generation'] != generation:
+                    continue
+                containers_cache.clear()
+                containers_cache.update(snapshot)
+                containers_cache_filled.set()
+                return
+
+
+def invalidate_containers_cache():
+    with containers_cache_lock:
+        containers_cache_state['generation'] += 1
+        containers_cache_filled.clear()
+
+
+def get_container_state(name: str):
+    if not containers_cache_filled.is_set():
+        refresh_containers_cache()
+    with containers_cache_lock:
+        return containers_cache.get(name)
+
+
+def apply_container_event(event):
+    """Updates the cache from a docker event, returns the container name and action"""
+    name = event['Actor']['Attributes'].get('name', '')
+    action = event['Action']
+    status = EVENT_STATUSES.get(action)
+    if not status or not name.startswith(EXPLORER_CONTAINER_PREFIXES):
+        return None, None
+    refresh_needed = False
+    with containers_cache_lock:
+        state = containers_cache.get(name)
+        if status == REMOVED_STATUS:
+            containers_cache.pop(name, None)
+        elif state and action not in ('create', 'start'):
+            state['status'] = status
+        else:
+            refresh_needed = True
+    if refresh_needed:
+        invalidate_containers_cache()
+    return name, action
 
 
 def is_container_exists(name: str) -> bool:
-    try:
-        dutils.containers.get(name)
-    except docker.errors.NotFound:
-        return False
-    return True
+    return get_container_state(name) is not None
 
 
 def get_info(container_id: str):
-    try:
-        container = dutils.containers.get(container_id)
-        return container.status
-    except docker.errors.NotFound:
+    state = get_container_state(container_id)
+    if state is None:
         logger.warning(
             f'Can not get info - no such container: {container_id}')
         return CONTAINER_NOT_FOUND
+    return state['status']
 
 
 def get_db_port(schain_name):
-    try:
-        db = dutils.containers.get(f'postgres_{schain_name}')
-        return get_container_host_port(db)
-    except docker.errors.NotFound:
-        return get_free_port()
-
-
-def get_container_host_port(container):
-    ports = list(container.attrs['NetworkSettings']['Ports'].values())
-    return ports[0][0]['HostPort']
+    """
+    Returns the published postgres port, stopped containers have no published ports
+    so the port saved in meta is used for them
+    """
+    state = get_container_state(f'postgres_{schain_name}')
+    if state and state['ports']:
+        return list(state['ports'].values())[0]
+    schain_meta = get_schain_meta(schain_name)
+    if schain_meta and schain_meta.get('db_port'):
+        return schain_meta['db_port']
+    return get_free_port()
 
 
 def restart_nginx():
@@ -75,6 +166,7 @@ def restart_postgres(schain_name):
         db = dutils.containers.get(f'postgres_{schain_name}')
         logger.info(f'Restarting postgres_{schain_name} container...')
         db.restart()
+        invalidate_containers_cache()
     except docker.errors.NotFound:
         logger.warning(f'DB for {schain_name} not found')
 
@@ -87,11 +179,7 @@ def get_free_port():
 
 
 def check_db_exists(schain_name):
-    try:
-        dutils.containers.get(f'postgres_{schain_name}')
-        return True
-    except docker.errors.NotFound:
-        return False
+    return is_container_exists(f'postgres_{schain_name}')
 
 
 def check_db_running(schain_name):
@@ -1,13 +1,20 @@
 import os
 import logging
 import socket
+from concurrent.futures import ThreadPoolExecutor, wait
 from enum import Enum
+from threading import Lock
+from time import monotonic
 
-from web3 import Web3, HTTPProvider, WebsocketProvider
+from web3 import Web3, WebsocketProvider
 from Crypto.Hash import keccak
 
-from admin import ENDPOINT, ABI_FILEPATH, PROXY_DOMAIN_NAME, SCHAIN_NAMES, FROM_FIRST_BLOCK
-from admin.utils.helper import read_json
+from admin import (PROXY_DOMAIN_NAME, SCHAIN_NAMES, FROM_FIRST_BLOCK,
+                   SCHAINS_REGISTRY_REFRESH_BLOCKS, ENDPOINT_PROBE_TIMEOUT,
+                   ENDPOINT_PROBE_DEADLINE, ENDPOINT_PROBE_WORKERS, ENDPOINT_MAX_BLOCK_LAG,
+                   NODES_INDEX_TTL)
+from admin.core.batch import batch_call
+from admin.core.providers import get_contract, get_web3, evict_endpoint
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +25,25 @@ SCHAIN_LAST_INDEX = os.environ.get('LAST_SCHAIN_ID')
 
 PORTS_PER_SCHAIN = 64
 
+schains_registry = {
+    'block': None,
+    'schains_number': None,
+    'hashes': [],
+    'schains': {},
+    'watched': False,
+    'version': 0
+}
+schains_registry_lock = Lock()
+
+nodes_index = {}
+nodes_index_lock = Lock()
+
+probe_executor = ThreadPoolExecutor(max_workers=ENDPOINT_PROBE_WORKERS,
+                                    thread_name_prefix='endpoint-probe')
+
+ranked_endpoints = {}
+ranked_endpoints_lock = Lock()
+
 
 class SkaledPorts(Enum):
     PROPOSAL = 0
@@ -41,18 +67,6 @@ def ip_from_bytes(bytes):
     return socket.inet_ntoa(bytes)
 
 
-def get_schain_index_in_node(schain_id, schains_ids_on_node):
-    for index, schain_id_on_node in enumerate(schains_ids_on_node):
-        if schain_id == schain_id_on_node:
-            return index
-    raise Exception(f'sChain {schain_id} is not found in the list: {schains_ids_on_node}')
-
-
-def get_schain_base_port_on_node(schain_id, schains_ids_on_node, node_base_port):
-    schain_index = get_schain_index_in_node(schain_id, schains_ids_on_node)
-    return calc_schain_base_port(node_base_port, schain_index)
-
-
 def calc_schain_base_port(node_base_port, schain_index):
     return node_base_port + schain_index * PORTS_PER_SCHAIN
 
@@ -75,79 +89,305 @@ def compose_endpoints(node_dict, endpoint_type):
     node_dict[f'info_http_endpoint_{endpoint_type}'] = f'http://{node_dict[endpoint_type]}:{node_dict["infoHttpRpcPort"]}' # noqa
 
 
-def endpoints_for_schain(schains_internal_contract, nodes_contract, schain_id):
-    node_ids = schains_internal_contract.functions.getNodesInGroup(schain_id).call()
-    nodes = []
+def fetch_nodes_index(schains_internal_contract, nodes_contract, schain_hashes):
+    """Reads groups of the sChains and every node once, indexes sChain slots on each node"""
+    groups = batch_call([
+        schains_internal_contract.functions.getNodesInGroup(schain_hash)
+        for schain_hash in schain_hashes
+    ])
+    node_ids = list(dict.fromkeys(node_id for group in groups for node_id in group))
+    node_calls = []
     for node_id in node_ids:
-        node = nodes_contract.functions.nodes(node_id).call()
-        node_dict = {
+        node_calls.append(nodes_contract.functions.nodes(node_id))
+        node_calls.append(nodes_contract.functions.getNodeDomainName(node_id))
+        node_calls.append(schains_internal_contract.functions.getSchainHashesForNode(node_id))
+    node_results = batch_call(node_calls)
+    nodes = {}
+    slots = {}
+    for index, node_id in enumerate(node_ids):
+        node, domain, hashes_on_node = node_results[index * 3:index * 3 + 3]
+        nodes[node_id] = {
             'id': node_id,
             'name': node[0],
             'ip': ip_from_bytes(node[1]),
             'base_port': node[3],
-            'domain': nodes_contract.functions.getNodeDomainName(node_id).call()
+            'domain': domain
         }
-        schain_hashes = schains_internal_contract.functions.getSchainHashesForNode(node_id).call()
-        node_dict['schain_base_port'] = get_schain_base_port_on_node(
-            schain_id,
-            schain_hashes, node_dict['base_port']
-        )
-        node_dict.update(calc_ports(node_dict['schain_base_port']))
-
-        compose_endpoints(node_dict, endpoint_type='ip')
-        compose_endpoints(node_dict, endpoint_type='domain')
-
-        nodes.append(node_dict)
-    schain = schains_internal_contract.functions.schains(schain_id).call()
+        for slot, schain_hash in enumerate(hashes_on_node):
+            slots[(node_id, schain_hash)] = slot
     return {
-        'schain': schain,
-        'schain_id': schain_name_to_id(schain[0])[:15],
-        'nodes': nodes
+        'groups': dict(zip(schain_hashes, groups)),
+        'nodes': nodes,
+        'slots': slots
     }
 
 
-def get_all_names():
-    if SCHAIN_NAMES:
-        return SCHAIN_NAMES.split(',')
+def get_schain_structs(schains_internal_contract, schain_hashes):
+    """Takes structs from the registry cache, reads only the ones it does not have"""
+    known_schains = schains_registry['schains']
+    missing_hashes = [schain_hash for schain_hash in schain_hashes
+                      if schain_hash not in known_schains]
+    missing_schains = batch_call([
+        schains_internal_contract.functions.schains(schain_hash) for schain_hash in missing_hashes
+    ])
+    schains = {
+        schain_hash: known_schains[schain_hash]
+        for schain_hash in schain_hashes if schain_hash in known_schains
+    }
+    for schain_hash, schain in zip(missing_hashes, missing_schains):
+        schains[schain_hash] = {'name': schain[0], 'struct': schain}
+    return schains
+
+
+def get_nodes_index():
+    """
+    Returns the index for sChains served by this agent, rebuilt when the registry
+    changes or on TTL, the registry is not refreshed here
+    """
+    with schains_registry_lock:
+        registry = dict(schains_registry)
+    key = (registry['version'], SCHAIN_NAMES, SCHAIN_FIRST_INDEX, SCHAIN_LAST_INDEX)
+    with nodes_index_lock:
+        if nodes_index.get('key') != key or \
+                nodes_index['built_at'] + NODES_INDEX_TTL < monotonic():
+            schain_hashes = get_served_hashes(registry)
+            logger.info(f'Building nodes index for {len(schain_hashes)} sChains')
+            schains_internal_contract = get_contract('schains_internal')
+            index = fetch_nodes_index(schains_internal_contract, get_contract('nodes'),
+                                      schain_hashes)
+            index['key'] = key
+            index['built_at'] = monotonic()
+            index['schains'] = get_schain_structs(schains_internal_contract, schain_hashes)
+            nodes_index.clear()
+            nodes_index.update(index)
+        return dict(nodes_index)
+
+
+def get_slot_base_port(index, node_id, schain_id):
+    slot = index['slots'].get((node_id, schain_id))
+    if slot is None:
+        raise Exception(f'sChain {schain_id} is not found on node {node_id}')
+    return calc_schain_base_port(index['nodes'][node_id]['base_port'], slot)
+
+
+def endpoints_for_schains(schains_internal_contract, nodes_contract, schain_ids):
+    """Resolves nodes and endpoints of several sChains from the shared nodes index"""
+    index = get_nodes_index()
+    missing_ids = [schain_id for schain_id in schain_ids if schain_id not in index['groups']]
+    if missing_ids:
+        missing_index = fetch_nodes_index(schains_internal_contract, nodes_contract, missing_ids)
+        index = {
+            'groups': {**index['groups'], **missing_index['groups']},
+            'nodes': {**index['nodes'], **missing_index['nodes']},
+            'slots': {**index['slots'], **missing_index['slots']},
+            'schains': {
+                **index['schains'],
+                **get_schain_structs(schains_internal_contract, missing_ids)
+            }
+        }
+
+    results = []
+    for schain_id in schain_ids:
+        nodes = []
+        for node_id in index['groups'][schain_id]:
+            node_dict = dict(index['nodes'][node_id])
+            node_dict['schain_base_port'] = get_slot_base_port(index, node_id, schain_id)
+            node_dict.update(calc_ports(node_dict['schain_base_port']))
+
+            compose_endpoints(node_dict, endpoint_type='ip')
+            compose_endpoints(node_dict, endpoint_type='domain')
+
+            nodes.append(node_dict)
+        schain = index['schains'][schain_id]['struct']
+        results.append({
+            'schain': schain,
+            'schain_id': schain_name_to_id(schain[0])[:15],
+            'nodes': nodes
+        })
+    return results
+
+
+def endpoints_for_schain(schains_internal_contract, nodes_contract, schain_id):
+    return endpoints_for_schains(schains_internal_contract, nodes_contract, [schain_id])[0]
+
+
+def is_registry_outdated(schains_internal_contract, block_number):
+    if schains_registry['block'] is None:
+        return True
+    if block_number - schains_registry['block'] >= SCHAINS_REGISTRY_REFRESH_BLOCKS:
+        return True
+    schains_number = schains_internal_contract.functions.numberOfSchains().call()
+    return schains_number != schains_registry['schains_number']
 
-    provider = HTTPProvider(ENDPOINT)
-    web3 = Web3(provider)
-    sm_abi = read_json(ABI_FILEPATH)
 
-    schains_internal_contract = web3.eth.contract(
-        address=sm_abi['schains_internal_address'],
-        abi=sm_abi['schains_internal_abi']
-    )
+def refresh_schains_registry(schains_internal_contract, block_number):
+    """Re-reads the sChains list, returns names of added and removed sChains"""
     schain_hashes = schains_internal_contract.functions.getSchains().call()
+    known_schains = schains_registry['schains']
+    new_hashes = [schain_hash for schain_hash in schain_hashes if schain_hash not in known_schains]
+    new_schains = batch_call([
+        schains_internal_contract.functions.schains(schain_hash) for schain_hash in new_hashes
+    ])
+    schains = {
+        schain_hash: known_schains[schain_hash]
+        for schain_hash in schain_hashes
+        if schain_hash in known_schains
+    }
+    for schain_hash, schain in zip(new_hashes, new_schains):
+        schains[schain_hash] = {'name': schain[0], 'struct': schain}
+    new_names = [schains[schain_hash]['name'] for schain_hash in new_hashes]
+    removed_names = [
+        schain['name'] for schain_hash, schain in known_schains.items()
+        if schain_hash not in schains
+    ]
+    logger.info(f'sChains registry refreshed at block {block_number}: {len(schains)} sChains, '
+                f'{len(new_names)} new, {len(removed_names)} removed')
+    hashes_changed = schain_hashes != schains_registry['hashes']
+    schains_registry.update({
+        'block': block_number,
+        'schains_number': len(schain_hashes),
+        'hashes': schain_hashes,
+        'schains': schains
+    })
+    if hashes_changed:
+        schains_registry['version'] += 1
+    return new_names, removed_names
+
+
+def get_schains_registry():
+    """Returns the cached sChain hashes and structs, refreshing them when outdated"""
+    schains_internal_contract = get_contract('schains_internal')
+    with schains_registry_lock:
+        if schains_registry['watched'] and schains_registry['block'] is not None:
+            return dict(schains_registry)
+        block_number = get_web3().eth.block_number
+        if is_registry_outdated(schains_internal_contract, block_number):
+            refresh_schains_registry(schains_internal_contract, block_number)
+        return dict(schains_registry)
+
+
+def scan_schains_registry(block_number):
+    """Full registry scan used by the events watcher, switches the registry to watched mode"""
+    with schains_registry_lock:
+        changes = refresh_schains_registry(get_contract('schains_internal'), block_number)
+        schains_registry['watched'] = True
+        return changes
+
+
+def unwatch_schains_registry():
+    """Returns the registry to polling when the events watcher can not keep it up to date"""
+    with schains_registry_lock:
+        schains_registry['watched'] = False
+
+
+def add_schain_to_registry(schain_hash):
+    schain = get_contract('schains_internal').functions.schains(schain_hash).call()
+    with schains_registry_lock:
+        if schain_hash not in schains_registry['schains']:
+            schains_registry['hashes'] = schains_registry['hashes'] + [schain_hash]
+        schains_registry['schains'] = {
+            **schains_registry['schains'],
+            schain_hash: {'name': schain[0], 'struct': schain}
+        }
+        schains_registry['schains_number'] = len(schains_registry['hashes'])
+        schains_registry['version'] += 1
+    return schain[0]
+
+
+def remove_schain_from_registry(schain_hash):
+    with schains_registry_lock:
+        hashes = list(schains_registry['hashes'])
+        if schain_hash in hashes:
+            # SchainsInternal moves the last hash into the removed slot, shards depend on it
+            index = hashes.index(schain_hash)
+            hashes[index] = hashes[-1]
+            hashes.pop()
+        schains_registry['hashes'] = hashes
+        schains = dict(schains_registry['schains'])
+        schain = schains.pop(schain_hash, None)
+        schains_registry['schains'] = schains
+        schains_registry['schains_number'] = len(schains_registry['hashes'])
+        schains_registry['version'] += 1
+    return schain['name'] if schain else None
+
+
+def get_served_hashes(registry):
+    """Returns hashes of the sChains this agent serves out of a registry snapshot"""
+    if SCHAIN_NAMES:
+        return [
+            bytes.fromhex(schain_name_to_id(schain_name)[2:])
+            for schain_name in SCHAIN_NAMES.split(',')
+        ]
+    schain_hashes = registry['hashes']
     first = int(SCHAIN_FIRST_INDEX) if SCHAIN_FIRST_INDEX else 0
     last = int(SCHAIN_LAST_INDEX) if SCHAIN_LAST_INDEX else len(schain_hashes)
+    return schain_hashes[first:last]
+
+
+def get_all_names():
+    if SCHAIN_NAMES:
+        return SCHAIN_NAMES.split(',')
+
+    registry = get_schains_registry()
     return [
-        schains_internal_contract.functions.schains(id).call()[0]
-        for id in schain_hashes[first:last]
+        registry['schains'][schain_hash]['name']
+        for schain_hash in get_served_hashes(registry)
     ]
 
 
 def is_dkg_passed(schain_name):
-    provider = HTTPProvider(ENDPOINT)
-    web3 = Web3(provider)
-    sm_abi = read_json(ABI_FILEPATH)
-    dkg_contract = web3.eth.contract(address=sm_abi['skale_d_k_g_address'],
-                                     abi=sm_abi['skale_d_k_g_abi'])
-    group_id = web3.keccak(text=schain_name)
+    dkg_contract = get_contract('skale_d_k_g')
+    group_id = Web3.keccak(text=schain_name)
     return dkg_contract.functions.isLastDKGSuccessful(group_id).call()
 
 
 def check_endpoint(endpoint, ws=False):
+    return probe_endpoint(endpoint, ws) is not None
+
+
+def probe_endpoint(endpoint, ws=False):
+    """Returns latency and head block of the endpoint, None if it does not respond"""
+    started_at = monotonic()
     try:
         if ws:
-            w3 = Web3(WebsocketProvider(endpoint))
+            w3 = Web3(WebsocketProvider(endpoint, websocket_timeout=ENDPOINT_PROBE_TIMEOUT))
         else:
-            w3 = Web3(HTTPProvider(endpoint))
-        w3.eth.get_block_number()
-        return True
+            w3 = get_web3(endpoint, timeout=ENDPOINT_PROBE_TIMEOUT)
+        block_number = w3.eth.get_block_number()
     except Exception as e:
         logger.warning(f'Check {endpoint} endpoint fail with {e}')
-        return False
+        return None
+    return {
+        'endpoint': endpoint,
+        'latency': monotonic() - started_at,
+        'block_number': block_number
+    }
+
+
+def rank_endpoints(endpoints, ws=False):
+    """Probes endpoints concurrently, returns responsive ones ordered from fresh and fast"""
+    if not endpoints:
+        return []
+    futures = [probe_executor.submit(probe_endpoint, endpoint, ws) for endpoint in endpoints]
+    done, not_done = wait(futures, timeout=ENDPOINT_PROBE_DEADLINE)
+    if not_done:
+        for future in not_done:
+            future.cancel()
+        logger.warning(f'{len(not_done)} endpoints did not respond in {ENDPOINT_PROBE_DEADLINE}s')
+    probes = [future.result() for future in done if future.result()]
+    if not probes:
+        return []
+    head = max(probe['block_number'] for probe in probes)
+    return sorted(probes, key=lambda probe: (
+        head - probe['block_number'] > ENDPOINT_MAX_BLOCK_LAG,
+        probe['latency']
+    ))
+
+
+def get_ranked_endpoints(schain_name, ws=False):
+    """Returns the endpoints ranked by the last get_schain_endpoint call, best first"""
+    with ranked_endpoints_lock:
+        return list(ranked_endpoints.get((schain_name, ws), []))
 
 
 def get_proxy_endpoint(schain_name, ws=False):
@@ -156,18 +396,16 @@ def get_proxy_endpoint(schain_name, ws=False):
     return f'https://{PROXY_DOMAIN_NAME}/v1/{schain_name}'
 
 
-def get_first_block(schain_name):
+def get_first_block(schain_name, endpoint=None):
     if FROM_FIRST_BLOCK:
         return 0
-    endpoint = get_schain_endpoint(schain_name)
-    w3 = Web3(HTTPProvider(endpoint))
-    return w3.eth.get_block_number()
+    endpoint = endpoint or get_schain_endpoint(schain_name)
+    return get_web3(endpoint).eth.get_block_number()
 
 
-def get_chain_id(schain_name):
-    endpoint = get_schain_endpoint(schain_name)
-    w3 = Web3(HTTPProvider(endpoint))
-    return w3.eth.chain_id
+def get_chain_id(schain_name, endpoint=None):
+    endpoint = endpoint or get_schain_endpoint(schain_name)
+    return get_web3(endpoint).eth.chain_id
 
 
 def get_schain_endpoint(schain_name, ws=False):
@@ -175,38 +413,36 @@ def get_schain_endpoint(schain_name, ws=False):
     if check_endpoint(proxy, ws):
         return proxy
 
-    provider = HTTPProvider(ENDPOINT)
-    web3 = Web3(provider)
-    sm_abi = read_json(ABI_FILEPATH)
-    schains_internal_contract = web3.eth.contract(
-        address=sm_abi['schains_internal_address'],
-        abi=sm_abi['schains_internal_abi'])
-    nodes_contract = web3.eth.contract(address=sm_abi['nodes_address'], abi=sm_abi['nodes_abi'])
+    schains_internal_contract = get_contract('schains_internal')
+    nodes_contract = get_contract('nodes')
     schain_id = bytes.fromhex(schain_name_to_id(schain_name)[2:])
     endpoints = endpoints_for_schain(schains_internal_contract, nodes_contract, schain_id)
-    for node in endpoints['nodes']:
-        if ws:
-            endpoint = node['ws_endpoint_domain']
-        else:
-            endpoint = node['https_endpoint_domain']
-        if check_endpoint(endpoint, ws):
-            return endpoint
+    endpoint_key = 'ws_endpoint_domain' if ws else 'https_endpoint_domain'
+    node_endpoints = [node[endpoint_key] for node in endpoints['nodes']]
+    ranked = rank_endpoints(node_endpoints, ws)
+    with ranked_endpoints_lock:
+        ranked_endpoints[(schain_name, ws)] = [probe['endpoint'] for probe in ranked]
+    best_endpoint = ranked[0]['endpoint'] if ranked else None
+    for endpoint in node_endpoints:
+        if endpoint != best_endpoint:
+            evict_endpoint(endpoint)
+    if ranked:
+        best = ranked[0]
+        logger.info(f'Selected {best["endpoint"]} for {schain_name}: '
+                    f'{best["latency"]:.3f}s latency, block {best["block_number"]}')
+        return best['endpoint']
 
 
 def get_schain_info(schain_name):
-    provider = HTTPProvider(ENDPOINT)
-    web3 = Web3(provider)
-    sm_abi = read_json(ABI_FILEPATH)
-    schains_internal_contract = web3.eth.contract(address=sm_abi['schains_internal_address'],
-                                                  abi=sm_abi['schains_internal_abi'])
-    nodes_contract = web3.eth.contract(address=sm_abi['nodes_address'], abi=sm_abi['nodes_abi'])
+    schains_internal_contract = get_contract('schains_internal')
+    nodes_contract = get_contract('nodes')
 
     schain_id = bytes.fromhex(schain_name_to_id(schain_name)[2:])
-    schain_info = schains_internal_contract.functions.schains(schain_id).call()
-    node_ids = schains_internal_contract.functions.getNodesInGroup(schain_id).call()
-    wallets = []
-    for node_id in node_ids:
-        wallets.append(nodes_contract.functions.getNodeAddress(node_id).call())
+    schain_info, node_ids = batch_call([
+        schains_internal_contract.functions.schains(schain_id),
+        schains_internal_contract.functions.getNodesInGroup(schain_id)
+    ])
+    wallets = batch_call([nodes_contract.functions.getNodeAddress(node_id) for node_id in node_ids])
     return {
         'mainnetOwner': schain_info[1],
         'originator': schain_info[10],
@@ -0,0 +1,54 @@
+import logging
+from threading import Lock, Timer
+
+from admin import EVENT_RECONCILE_DELAY
+from admin.core.containers import (dutils, refresh_containers_cache, apply_container_event,
+                                   EVENT_STATUSES)
+from admin.core.reconciler import submit_schain_check
+
+logger = logging.getLogger(__name__)
+
+FAILURE_ACTIONS = ('die', 'oom', 'stop')
+
+scheduled_checks = {}
+scheduled_checks_lock = Lock()
+
+
+def schain_name_from_container(container_name):
+    return container_name.split('_', 1)[1]
+
+
+def run_scheduled_check(schain_name):
+    with scheduled_checks_lock:
+        scheduled_checks.pop(schain_name, None)
+    if submit_schain_check(schain_name) is None:
+        logger.info(f'Check for {schain_name} is already in progress')
+
+
+def schedule_schain_check(schain_name):
+    """Coalesces bursts of events (stop, die, destroy) into a single check"""
+    with scheduled_checks_lock:
+        if schain_name in scheduled_checks:
+            return
+        timer = Timer(EVENT_RECONCILE_DELAY, run_scheduled_check, args=(schain_name,))
+        timer.daemon = True
+        scheduled_checks[schain_name] = timer
+    timer.start()
+
+
+def watch_container_events():
+    events = dutils.events(decode=True, filters={
+        'type': 'container',
+        'event': list(EVENT_STATUSES)
+    })
+    try:
+        refresh_containers_cache()
+        logger.info('Subscribed to docker events')
+        for event in events:
+            container_name, action = apply_container_event(event)
+            if action in FAILURE_ACTIONS:
+                schain_name = schain_name_from_container(container_name)
+                logger.warning(f'{container_name} got {action} event, scheduling check')
+                schedule_schain_check(schain_name)
+    finally:
+        events.close()
@@ -0,0 +1,119 @@
+import logging
+import random
+from threading import Lock, BoundedSemaphore
+from time import monotonic, sleep
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from admin import (EXPLORER_API_CONNECT_TIMEOUT, EXPLORER_API_READ_TIMEOUT,
+                   EXPLORER_API_RETRIES, EXPLORER_API_BACKOFF, EXPLORER_API_CONCURRENCY)
+from admin.core.providers import get_session
+
+logger = logging.getLogger(__name__)
+
+explorer_api_lock = Lock()
+semaphores = {}
+api_stats = {}
+
+
+class ExplorerApiError(Exception):
+    pass
+
+
+def get_semaphore(explorer_endpoint):
+    with explorer_api_lock:
+        semaphore = semaphores.get(explorer_endpoint)
+        if semaphore is None:
+            semaphore = BoundedSemaphore(EXPLORER_API_CONCURRENCY)
+            semaphores[explorer_endpoint] = semaphore
+        return semaphore
+
+
+def record_request(explorer_endpoint, latency, error):
+    with explorer_api_lock:
+        stats = api_stats.setdefault(explorer_endpoint, {
+            'requests': 0,
+            'errors': 0,
+            'total_latency': 0,
+            'max_latency': 0
+        })
+        stats['requests'] += 1
+        stats['errors'] += int(error)
+        stats['total_latency'] += latency
+        stats['max_latency'] = max(stats['max_latency'], latency)
+
+
+def get_api_stats():
+    with explorer_api_lock:
+        return {
+            explorer_endpoint: {
+                'requests': stats['requests'],
+                'errors': stats['errors'],
+                'avg_latency': round(stats['total_latency'] / stats['requests'], 3),
+                'max_latency': round(stats['max_latency'], 3)
+            }
+            for explorer_endpoint, stats in api_stats.items()
+        }
+
+
+def log_api_stats():
+    for explorer_endpoint, stats in get_api_stats().items():
+        logger.info(f'Explorer API {explorer_endpoint}: {stats}')
+
+
+def is_connection_not_established(error):
+    """True if the request failed before the connection was made, so nothing was sent"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError):
+        return False
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, 'reason', reason)
+    return isinstance(reason, NewConnectionError)
+
+
+def is_retryable(method, error):
+    """POST requests are retried only if they did not reach the explorer"""
+    if method != 'GET':
+        return is_connection_not_established(error)
+    if isinstance(error, requests.exceptions.HTTPError):
+        status_code = error.response.status_code if error.response is not None else None
+        return status_code == 429 or status_code is None or status_code >= 500
+    return isinstance(error, (requests.exceptions.RequestException, ValueError))
+
+
+def api_request(explorer_endpoint, params, method='GET', data=None,
+                retries=EXPLORER_API_RETRIES):
+    """Calls blockscout /api of the explorer, returns the parsed JSON response"""
+    url = f'{explorer_endpoint}/api'
+    headers = {'content-type': 'application/json'}
+    session = get_session(explorer_endpoint)
+    for attempt in range(retries + 1):
+        start = monotonic()
+        try:
+            with get_semaphore(explorer_endpoint):
+                response = session.request(
+                    method, url, params=params, data=data, headers=headers,
+                    timeout=(EXPLORER_API_CONNECT_TIMEOUT, EXPLORER_API_READ_TIMEOUT)
+                )
+                response.raise_for_status()
+                result = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            record_request(explorer_endpoint, monotonic() - start, error=True)
+            if attempt == retries or not is_retryable(method, e):
+                raise ExplorerApiError(f'{method} {url} {params} failed with {e}') from e
+            delay = EXPLORER_API_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5)
+            logger.debug(f'{method} {url} failed with {e}, retrying in {delay:.2f}s')
+            sleep(delay)
+            continue
+        record_request(explorer_endpoint, monotonic() - start, error=False)
+        return result
+
+
+def api_get(explorer_endpoint, retries=EXPLORER_API_RETRIES, **params):
+    return api_request(explorer_endpoint, params, retries=retries)
+
+
+def api_post(explorer_endpoint, data, **params):
+    return api_request(explorer_endpoint, params, method='POST', data=data)
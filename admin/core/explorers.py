@@ -3,15 +3,17 @@ import os
 import subprocess
 
 from admin import (DOCKER_COMPOSE_CONFIG_PATH, DOCKER_COMPOSE_BIN_PATH,
-                   COMPOSE_HTTP_TIMEOUT, BLOCKSCOUT_DATA_DIR)
+                   COMPOSE_HTTP_TIMEOUT, COMPOSE_UP_TIMEOUT, BLOCKSCOUT_DATA_DIR)
 from admin.configs.meta import (update_meta_data, get_schain_meta, get_explorers_meta,
                                 set_schain_upgraded, is_schain_upgraded, verified_contracts)
-from admin.configs.nginx import regenerate_nginx_config
+from admin.configs.nginx import update_schain_nginx_config, pop_nginx_reload, mark_nginx_reload
 from admin.configs.schains import generate_config
-from admin.core.containers import (get_free_port, restart_nginx,
-                                   is_explorer_running, remove_explorer)
-from admin.core.endpoints import is_dkg_passed, get_schain_endpoint, get_first_block, get_chain_id
-from admin.core.verify import verify
+from admin.core.containers import (get_free_port, restart_nginx, is_explorer_running,
+                                   remove_explorer, invalidate_containers_cache)
+from admin.core.endpoints import (is_dkg_passed, get_schain_endpoint, get_first_block,
+                                  get_chain_id, get_ranked_endpoints)
+from admin.core.providers import evict_endpoint
+from admin.core.verify import schedule_verification, clear_pending_verifications
 from admin.migrations.revert_reasons import upgrade
 
 logger = logging.getLogger(__name__)
@@ -22,8 +24,9 @@ def run_explorer(schain_name, chain_id, endpoint, ws_endpoint):
     explorer_port = schain_meta['port'] if schain_meta else get_free_port()
     db_port = schain_meta['db_port'] if schain_meta else get_free_port()
     scv_port = schain_meta['scv_port'] if schain_meta else get_free_port()
-    first_block = schain_meta['first_block'] if schain_meta else get_first_block(schain_name)
-    config_host_path = generate_config(schain_name)
+    first_block = schain_meta['first_block'] if schain_meta \
+        else get_first_block(schain_name, endpoint)
+    config_host_path = generate_config(schain_name, endpoint)
     blockscout_data_dir = f'{BLOCKSCOUT_DATA_DIR}/{schain_name}'
     env = {
         'SCHAIN_NAME': schain_name,
@@ -47,29 +50,64 @@ def run_explorer(schain_name, chain_id, endpoint, ws_endpoint):
         'up',
         '-d'
     ]
-    subprocess.run(command, env={**env, **os.environ})
+    clear_pending_verifications(schain_name)
+    if schain_meta and schain_meta.get('endpoint') != endpoint:
+        evict_endpoint(schain_meta.get('endpoint'))
+    subprocess.run(command, env={**env, **os.environ}, timeout=COMPOSE_UP_TIMEOUT)
+    invalidate_containers_cache()
     update_meta_data(schain_name, explorer_port, db_port, scv_port,
                      endpoint, ws_endpoint, first_block)
-    regenerate_nginx_config()
-    restart_nginx()
+    update_schain_nginx_config(schain_name)
     logger.info(f'sChain explorer is running on {schain_name}. subdomain')
 
 
+def reload_nginx_if_needed():
+    if not pop_nginx_reload():
+        return
+    try:
+        restart_nginx()
+    except Exception:
+        mark_nginx_reload()
+        raise
+
+
+def get_chain_id_with_fallback(schain_name, endpoint):
+    """
+    Returns the endpoint and chain id, if the selected endpoint fails the next
+    ranked endpoints of the sChain are tried
+    """
+    fallbacks = [ranked for ranked in get_ranked_endpoints(schain_name) if ranked != endpoint]
+    for candidate in [endpoint, *fallbacks]:
+        try:
+            return candidate, get_chain_id(schain_name, candidate)
+        except Exception as e:
+            logger.warning(f'Getting chain id of {schain_name} from {candidate} failed with {e}')
+    return None, None
+
+
 def run_explorer_for_schain(schain_name):
     schain_meta = get_schain_meta(schain_name)
     if schain_meta and schain_meta.get('sync') is True:
         endpoint = schain_meta['endpoint']
         ws_endpoint = schain_meta['ws_endpoint']
+        chain_id = get_chain_id(schain_name, endpoint)
     else:
         endpoint = get_schain_endpoint(schain_name)
         ws_endpoint = get_schain_endpoint(schain_name, ws=True)
-    chain_id = get_chain_id(schain_name)
+        if endpoint:
+            endpoint, chain_id = get_chain_id_with_fallback(schain_name, endpoint)
     if endpoint and ws_endpoint:
         run_explorer(schain_name, chain_id, endpoint, ws_endpoint)
     else:
         logger.warning(f"Couldn't create blockexplorer instance for {schain_name}")
 
 
+def switch_explorer_endpoint(schain_name, endpoint, ws_endpoint):
+    logger.warning(f'Switching {schain_name} explorer to {endpoint} and {ws_endpoint}')
+    chain_id = get_chain_id(schain_name, endpoint)
+    run_explorer(schain_name, chain_id, endpoint, ws_endpoint)
+
+
 def check_explorer_for_schain(schain_name):
     explorers = get_explorers_meta()
     if schain_name not in explorers and not is_dkg_passed(schain_name):
@@ -87,4 +125,4 @@ def check_explorer_for_schain(schain_name):
             upgrade(schain_name)
         run_explorer_for_schain(schain_name)
     if not verified_contracts(schain_name) and is_explorer_running(schain_name):
-        verify(schain_name)
+        schedule_verification(schain_name)
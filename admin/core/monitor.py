@@ -0,0 +1,200 @@
+import json
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from statistics import median
+from time import monotonic, time
+
+from admin import (ENDPOINT_MONITOR_WINDOW, ENDPOINT_MONITOR_WORKERS, ENDPOINT_SWITCH_MARGIN,
+                   ENDPOINT_SWITCH_COOLDOWN, ENDPOINT_CANDIDATES_TTL, ENDPOINT_DECISIONS_PATH,
+                   RPC_TIMEOUT)
+from admin.configs.meta import get_explorers_meta, get_explorer_endpoint
+from admin.core.containers import is_explorer_running
+from admin.core.endpoints import (endpoints_for_schain, get_proxy_endpoint, probe_endpoint,
+                                  schain_name_to_id)
+from admin.core.explorers import switch_explorer_endpoint
+from admin.core.explorer_api import api_get
+from admin.core.providers import get_contract, evict_endpoint
+from admin.core.reconciler import submit_schain_task
+
+logger = logging.getLogger(__name__)
+
+ERROR_PENALTY = 10
+LAG_PENALTY = 1
+
+endpoint_samples = {}
+indexed_samples = {}
+candidates_cache = {}
+last_switches = {}
+pending_results = {}
+
+
+def get_candidates(schain_name):
+    """Returns (endpoint, ws_endpoint) pairs of the proxy and every sChain node"""
+    cached = candidates_cache.get(schain_name)
+    if cached and cached['expires_at'] > monotonic():
+        return cached['candidates']
+    schain_id = bytes.fromhex(schain_name_to_id(schain_name)[2:])
+    endpoints = endpoints_for_schain(get_contract('schains_internal'), get_contract('nodes'),
+                                     schain_id)
+    candidates = [(get_proxy_endpoint(schain_name), get_proxy_endpoint(schain_name, ws=True))]
+    candidates.extend(
+        (node['https_endpoint_domain'], node['ws_endpoint_domain'])
+        for node in endpoints['nodes']
+    )
+    if cached:
+        for endpoint, _ in set(cached['candidates']) - set(candidates):
+            evict_endpoint(endpoint)
+    candidates_cache[schain_name] = {
+        'expires_at': monotonic() + ENDPOINT_CANDIDATES_TTL,
+        'candidates': candidates
+    }
+    return candidates
+
+
+def get_indexed_block(schain_name):
+    explorer_endpoint = get_explorer_endpoint(schain_name)
+    try:
+        response = api_get(explorer_endpoint, module='block', action='eth_block_number', retries=0)
+        return int(response['result'], 16)
+    except Exception as e:
+        logger.warning(f'Can not get indexed block for {schain_name}: {e}')
+
+
+def get_indexing_rate(schain_name):
+    samples = indexed_samples.get(schain_name)
+    if not samples or len(samples) < 2:
+        return None
+    (first_time, first_block), (last_time, last_block) = samples[0], samples[-1]
+    return round((last_block - first_block) / (last_time - first_time), 3)
+
+
+def record_sample(endpoint, probe, head):
+    samples = endpoint_samples.setdefault(endpoint, deque(maxlen=ENDPOINT_MONITOR_WINDOW))
+    if probe is None:
+        samples.append({'error': True, 'latency': None, 'lag': None})
+    else:
+        samples.append({
+            'error': False,
+            'latency': probe['latency'],
+            'lag': head - probe['block_number']
+        })
+
+
+def get_endpoint_stats(endpoint):
+    """Aggregates the sampling window, None until the window is full"""
+    samples = endpoint_samples.get(endpoint)
+    if not samples or len(samples) < ENDPOINT_MONITOR_WINDOW:
+        return None
+    succeeded = [sample for sample in samples if not sample['error']]
+    error_rate = 1 - len(succeeded) / len(samples)
+    latency = median(sample['latency'] for sample in succeeded) if succeeded else RPC_TIMEOUT
+    lag = median(sample['lag'] for sample in succeeded) if succeeded else 0
+    return {
+        'error_rate': round(error_rate, 3),
+        'latency': round(latency, 3),
+        'lag': lag,
+        'score': round(latency + error_rate * ERROR_PENALTY + lag * LAG_PENALTY, 3)
+    }
+
+
+def record_decision(decision):
+    decision['time'] = int(time())
+    logger.info(f'Endpoint decision: {decision}')
+    with open(ENDPOINT_DECISIONS_PATH, 'a') as f:
+        f.write(json.dumps(decision) + '\n')
+
+
+def check_switch_result(schain_name):
+    pending = pending_results.get(schain_name)
+    if not pending or monotonic() - pending['switched_at'] < pending['window']:
+        return
+    del pending_results[schain_name]
+    record_decision({
+        'type': 'switch_result',
+        'schain_name': schain_name,
+        'endpoint': pending['endpoint'],
+        'indexing_rate_before': pending['indexing_rate_before'],
+        'indexing_rate_after': get_indexing_rate(schain_name)
+    })
+
+
+def monitor_schain(schain_name, schain_meta, probe_executor):
+    current = (schain_meta['endpoint'], schain_meta['ws_endpoint'])
+    candidates = get_candidates(schain_name)
+    if current not in candidates:
+        candidates = [current] + candidates
+    probes = list(probe_executor.map(probe_endpoint, [endpoint for endpoint, _ in candidates]))
+    responsive = [probe for probe in probes if probe]
+    head = max(probe['block_number'] for probe in responsive) if responsive else 0
+    for (endpoint, _), probe in zip(candidates, probes):
+        record_sample(endpoint, probe, head)
+
+    indexed_block = get_indexed_block(schain_name)
+    if indexed_block is not None:
+        indexed_samples.setdefault(
+            schain_name, deque(maxlen=ENDPOINT_MONITOR_WINDOW)
+        ).append((monotonic(), indexed_block))
+    check_switch_result(schain_name)
+
+    current_stats = get_endpoint_stats(current[0])
+    if current_stats is None:
+        return
+    best, best_stats = None, None
+    for candidate in candidates:
+        stats = get_endpoint_stats(candidate[0])
+        if candidate == current or not stats:
+            continue
+        if not best_stats or stats['score'] < best_stats['score']:
+            best, best_stats = candidate, stats
+    if not best or best_stats['score'] >= current_stats['score'] * (1 - ENDPOINT_SWITCH_MARGIN):
+        return
+
+    decision = {
+        'schain_name': schain_name,
+        'from': current[0],
+        'to': best[0],
+        'current_stats': current_stats,
+        'candidate_stats': best_stats,
+        'indexing_rate_before': get_indexing_rate(schain_name)
+    }
+    last_switch = last_switches.get(schain_name)
+    if last_switch and monotonic() - last_switch < ENDPOINT_SWITCH_COOLDOWN:
+        record_decision({'type': 'hold', 'reason': 'cooldown', **decision})
+        return
+    if submit_schain_task(schain_name, switch_explorer_endpoint, *best) is None:
+        record_decision({'type': 'hold', 'reason': 'check in progress', **decision})
+        return
+    record_decision({'type': 'switch', **decision})
+    last_switches[schain_name] = monotonic()
+    indexed_samples.pop(schain_name, None)
+    pending_results[schain_name] = {
+        'switched_at': monotonic(),
+        'window': ENDPOINT_SWITCH_COOLDOWN,
+        'endpoint': best[0],
+        'indexing_rate_before': decision['indexing_rate_before']
+    }
+
+
+def monitor_endpoints():
+    explorers = get_explorers_meta()
+    schains = [
+        schain_name for schain_name, schain_meta in explorers.items()
+        if schain_meta.get('endpoint') and schain_meta.get('sync') is not True
+        and not schain_meta.get('explorer_origin') and is_explorer_running(schain_name)
+    ]
+    with ThreadPoolExecutor(max_workers=ENDPOINT_MONITOR_WORKERS,
+                            thread_name_prefix='endpoint-probe') as probe_executor, \
+            ThreadPoolExecutor(max_workers=ENDPOINT_MONITOR_WORKERS,
+                               thread_name_prefix='endpoint-monitor') as schains_executor:
+        futures = {
+            schains_executor.submit(
+                monitor_schain, schain_name, explorers[schain_name], probe_executor
+            ): schain_name
+            for schain_name in schains
+        }
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.warning(f'Endpoint monitoring failed for {futures[future]}: {e}')
@@ -0,0 +1,99 @@
+import logging
+import os
+from threading import RLock
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3, HTTPProvider
+
+from admin import ENDPOINT, ABI_FILEPATH, RPC_TIMEOUT, HTTP_POOL_SIZE
+from admin.utils.helper import read_json
+
+logger = logging.getLogger(__name__)
+
+providers_lock = RLock()
+sessions = {}
+web3_instances = {}
+contracts = {}
+sm_abi_cache = {
+    'mtime': None,
+    'abi': None
+}
+
+
+def get_session(endpoint):
+    """Returns a keep-alive session shared by all threads talking to the endpoint"""
+    with providers_lock:
+        session = sessions.get(endpoint)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            sessions[endpoint] = session
+        return session
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """
+    Posts through get_session, web3 keeps its own small session cache that closes
+    evicted sessions and falls back to sessions without the pooled adapter
+    """
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        response = get_session(self.endpoint_uri).post(
+            self.endpoint_uri, data=request_data, **self.get_request_kwargs()
+        )
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+
+def get_web3(endpoint=ENDPOINT, timeout=RPC_TIMEOUT):
+    """Returns a cached web3 for the endpoint, probes pass a shorter timeout"""
+    with providers_lock:
+        web3 = web3_instances.get((endpoint, timeout))
+        if web3 is None:
+            provider = PooledHTTPProvider(endpoint, request_kwargs={'timeout': timeout})
+            web3 = Web3(provider)
+            web3_instances[(endpoint, timeout)] = web3
+        return web3
+
+
+def evict_endpoint(endpoint):
+    """
+    Drops the session and web3 instances of an endpoint that is not used anymore,
+    threads still holding them finish their requests
+    """
+    if endpoint == ENDPOINT:
+        return
+    with providers_lock:
+        sessions.pop(endpoint, None)
+        for key in [key for key in web3_instances if key[0] == endpoint]:
+            del web3_instances[key]
+
+
+def get_sm_abi():
+    """Returns parsed skale-manager ABI, re-reading it only when the file is modified"""
+    mtime = os.path.getmtime(ABI_FILEPATH)
+    with providers_lock:
+        if sm_abi_cache['mtime'] != mtime:
+            logger.info(f'Loading skale-manager ABI from {ABI_FILEPATH}')
+            sm_abi_cache.update({
+                'mtime': mtime,
+                'abi': read_json(ABI_FILEPATH)
+            })
+            contracts.clear()
+        return sm_abi_cache['abi']
+
+
+def get_contract(name):
+    sm_abi = get_sm_abi()
+    with providers_lock:
+        contract = contracts.get(name)
+        if contract is None:
+            contract = get_web3().eth.contract(
+                address=sm_abi[f'{name}_address'],
+                abi=sm_abi[f'{name}_abi']
+            )
+            contracts[name] = contract
+        return contract
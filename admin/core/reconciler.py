@@ -0,0 +1,93 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Event, Lock
+from time import monotonic
+
+from admin import EXPLORERS_CHECK_WORKERS, SCHAIN_CHECK_TIMEOUT
+from admin.core.containers import invalidate_containers_cache
+from admin.configs.nginx import regenerate_nginx_config
+from admin.core.explorers import check_explorer_for_schain, reload_nginx_if_needed
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(max_workers=EXPLORERS_CHECK_WORKERS,
+                              thread_name_prefix='schain-checker')
+checks_lock = Lock()
+checks_in_progress = {}
+cycle_running = Event()
+
+
+def run_schain_task(schain_name, task, *args):
+    with checks_lock:
+        checks_in_progress[schain_name] = monotonic()
+    try:
+        task(schain_name, *args)
+    except Exception as e:
+        logger.exception(f'{task.__name__} for {schain_name} failed with: {e}')
+    finally:
+        with checks_lock:
+            del checks_in_progress[schain_name]
+    if not cycle_running.is_set():
+        try:
+            reload_nginx_if_needed()
+        except Exception as e:
+            logger.warning(f'nginx reload after {task.__name__} failed with: {e}')
+
+
+def submit_schain_task(schain_name, task, *args):
+    """Schedules a task for the sChain, returns None if one is already queued or running"""
+    with checks_lock:
+        if schain_name in checks_in_progress:
+            return None
+        checks_in_progress[schain_name] = None
+    return executor.submit(run_schain_task, schain_name, task, *args)
+
+
+def submit_schain_check(schain_name):
+    return submit_schain_task(schain_name, check_explorer_for_schain)
+
+
+def get_check_running_time(schain_name):
+    with checks_lock:
+        started_at = checks_in_progress.get(schain_name)
+    return monotonic() - started_at if started_at else 0
+
+
+def reconcile_schains(schain_names):
+    started_at = monotonic()
+    cycle_running.set()
+    try:
+        futures, timed_out = check_schains(schain_names)
+    finally:
+        cycle_running.clear()
+        try:
+            regenerate_nginx_config()
+            reload_nginx_if_needed()
+        except Exception as e:
+            logger.exception(f'nginx update failed with: {e}')
+    logger.info(f'Reconciliation cycle took {monotonic() - started_at:.1f}s: '
+                f'{len(futures)} checked, {len(schain_names) - len(futures)} skipped, '
+                f'{len(timed_out)} timed out')
+
+
+def check_schains(schain_names):
+    invalidate_containers_cache()
+    futures = {}
+    for schain_name in schain_names:
+        future = submit_schain_check(schain_name)
+        if future:
+            futures[future] = schain_name
+        else:
+            logger.info(f'Check for {schain_name} is still in progress, skipping')
+    pending = set(futures)
+    timed_out = []
+    while pending:
+        _, pending = wait(pending, timeout=1)
+        for future in list(pending):
+            schain_name = futures[future]
+            if get_check_running_time(schain_name) > SCHAIN_CHECK_TIMEOUT:
+                logger.warning(f'Check for {schain_name} exceeded {SCHAIN_CHECK_TIMEOUT}s, '
+                               f'leaving it in background')
+                timed_out.append(schain_name)
+                pending.discard(future)
+    return futures, timed_out
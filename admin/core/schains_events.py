@@ -0,0 +1,107 @@
+import logging
+import os
+
+from eth_utils import encode_hex, event_abi_to_log_topic
+
+from admin import (SCHAINS_EVENTS_CHECKPOINT_PATH, SCHAINS_EVENTS_BLOCK_RANGE,
+                   SCHAINS_REGISTRY_CONSISTENCY_BLOCKS, SCHAINS_EVENTS_MAX_FAILURES)
+from admin.core.endpoints import (get_all_names, scan_schains_registry, add_schain_to_registry,
+                                  remove_schain_from_registry, unwatch_schains_registry)
+from admin.core.providers import get_contract, get_web3
+from admin.core.reconciler import submit_schain_check
+from admin.utils.helper import read_json, write_json
+
+logger = logging.getLogger(__name__)
+
+watcher_state = {
+    'scanned_block': None,
+    'failures': 0
+}
+
+
+def read_checkpoint():
+    if not os.path.isfile(SCHAINS_EVENTS_CHECKPOINT_PATH):
+        return None
+    return read_json(SCHAINS_EVENTS_CHECKPOINT_PATH)['block']
+
+
+def write_checkpoint(block_number):
+    write_json(SCHAINS_EVENTS_CHECKPOINT_PATH, {'block': block_number})
+
+
+def on_schain_created(schain_name):
+    logger.info(f'sChain {schain_name} created')
+    if schain_name in get_all_names():
+        submit_schain_check(schain_name)
+
+
+def on_schain_removed(schain_name):
+    logger.warning(f'sChain {schain_name} removed, its explorer is left as is')
+
+
+def get_schains_logs(from_block, to_block):
+    schains_contract = get_contract('schains')
+    created_event = schains_contract.events.SchainCreated()
+    deleted_event = schains_contract.events.SchainDeleted()
+    created_topic = event_abi_to_log_topic(created_event.abi)
+    deleted_topic = event_abi_to_log_topic(deleted_event.abi)
+    logs = get_web3().eth.get_logs({
+        'address': schains_contract.address,
+        'fromBlock': from_block,
+        'toBlock': to_block,
+        'topics': [[encode_hex(created_topic), encode_hex(deleted_topic)]]
+    })
+    for log in logs:
+        if log['topics'][0] == created_topic:
+            yield created_event.processLog(log)
+        else:
+            yield deleted_event.processLog(log)
+
+
+def process_schains_logs(from_block, to_block):
+    for event in get_schains_logs(from_block, to_block):
+        schain_hash = event['args']['schainHash']
+        if event['event'] == 'SchainCreated':
+            on_schain_created(add_schain_to_registry(schain_hash))
+        else:
+            schain_name = remove_schain_from_registry(schain_hash)
+            if schain_name:
+                on_schain_removed(schain_name)
+
+
+def watch_schains_events():
+    """Falls back to registry polling after several failed polls in a row"""
+    try:
+        follow_schains_logs()
+    except Exception:
+        watcher_state['failures'] += 1
+        if watcher_state['failures'] >= SCHAINS_EVENTS_MAX_FAILURES:
+            if watcher_state['failures'] == SCHAINS_EVENTS_MAX_FAILURES:
+                logger.warning(f'sChains events watcher failed {SCHAINS_EVENTS_MAX_FAILURES} '
+                               f'times in a row, falling back to sChains list polling')
+            unwatch_schains_registry()
+            watcher_state['scanned_block'] = None
+        raise
+    watcher_state['failures'] = 0
+
+
+def follow_schains_logs():
+    """Follows SchainCreated/SchainDeleted logs from the stored checkpoint"""
+    latest_block = get_web3().eth.block_number
+    checkpoint = read_checkpoint()
+    scanned_block = watcher_state['scanned_block']
+    if scanned_block is None or latest_block - scanned_block >= SCHAINS_REGISTRY_CONSISTENCY_BLOCKS:
+        added_names, removed_names = scan_schains_registry(latest_block)
+        watcher_state['scanned_block'] = latest_block
+        if scanned_block is not None:
+            for schain_name in added_names:
+                on_schain_created(schain_name)
+            for schain_name in removed_names:
+                on_schain_removed(schain_name)
+        if checkpoint is None:
+            write_checkpoint(latest_block)
+            return
+    for from_block in range(checkpoint + 1, latest_block + 1, SCHAINS_EVENTS_BLOCK_RANGE):
+        to_block = min(from_block + SCHAINS_EVENTS_BLOCK_RANGE - 1, latest_block)
+        process_schains_logs(from_block, to_block)
+        write_checkpoint(to_block)
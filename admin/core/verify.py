@@ -1,28 +1,115 @@
 import logging
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import monotonic, sleep
 
-import requests
 import json
 
 from web3 import Web3
 
-from admin.configs.meta import get_explorer_endpoint, set_chain_verified
-from admin.configs.schains import get_schain_config, set_contract_verified
+from admin import (VERIFICATION_WORKERS, VERIFICATION_DEADLINE, VERIFICATION_POLL_DELAY,
+                   VERIFICATION_MAX_POLL_DELAY, VERIFIED_CONTRACTS_IMPORT,
+                   VERIFICATION_SUBMIT_WORKERS, VERIFICATION_PENDING_TTL)
+from admin.configs.meta import (get_explorer_endpoint, set_chain_verified,
+                                get_verification_status, set_contract_verified,
+                                set_contracts_verified)
+from admin.configs.schains import get_verification_refs, get_verification_meta
+from admin.core.explorer_api import api_get, api_post, ExplorerApiError
+from admin.migrations.verified_contracts import import_verified_contracts
 
 logger = logging.getLogger(__name__)
 
+ALREADY_VERIFIED_RESULT = 'Smart-contract already verified.'
+PENDING_RESULTS = ('Pending in queue',)
+UNKNOWN_UID_RESULT = 'Unknown UID'
+LIST_CONTRACTS_PAGE_SIZE = 1000
+
+verification_executor = ThreadPoolExecutor(max_workers=VERIFICATION_WORKERS,
+                                           thread_name_prefix='verifier')
+verifications_lock = Lock()
+verifications_in_progress = set()
+pending_verifications = {}
+
+
+def schedule_verification(schain_name):
+    """Runs verification on the verification worker, returns False if it is already running"""
+    with verifications_lock:
+        if schain_name in verifications_in_progress:
+            return False
+        verifications_in_progress.add(schain_name)
+    verification_executor.submit(run_verification, schain_name)
+    return True
+
+
+def run_verification(schain_name):
+    try:
+        verify(schain_name)
+    except Exception as e:
+        logger.exception(f'Verification for {schain_name} failed with: {e}')
+    finally:
+        with verifications_lock:
+            verifications_in_progress.discard(schain_name)
+
+
+def take_pending_verifications(schain_name):
+    """Returns uids submitted in earlier runs, the ones older than the TTL are resubmitted"""
+    with verifications_lock:
+        pending = pending_verifications.pop(schain_name, {})
+    return {
+        verifying_address: item for verifying_address, item in pending.items()
+        if monotonic() - item['submitted_at'] < VERIFICATION_PENDING_TTL
+    }
+
+
+def clear_pending_verifications(schain_name):
+    """Drops uids of the explorer, its verification queue is lost when it is recreated"""
+    with verifications_lock:
+        pending_verifications.pop(schain_name, None)
+
 
 def verify(schain_name):
     logger.info(f'Verifying contracts for {schain_name}')
-    config = get_schain_config(schain_name)
-    verification_data = config['verify']
-    for verifying_address in verification_data.keys():
-        if not config['verification_status'][verifying_address]:
-            verify_contract(schain_name, verifying_address, verification_data[verifying_address])
+    verification_refs = get_verification_refs(schain_name)
+    verification_status = get_verification_status(schain_name)
+    unverified = {
+        address for address in verification_refs.keys()
+        if not verification_status.get(address)
+    }
+    if unverified:
+        verification_status = reconcile_verification_status(schain_name, unverified)
+    if VERIFIED_CONTRACTS_IMPORT:
+        verification_status = import_verification_status(
+            schain_name, verification_refs, verification_status
+        )
+    pending = take_pending_verifications(schain_name)
+    to_submit = [
+        verifying_address for verifying_address in verification_refs.keys()
+        if not verification_status.get(verifying_address) and verifying_address not in pending
+    ]
+    with ThreadPoolExecutor(max_workers=VERIFICATION_SUBMIT_WORKERS,
+                            thread_name_prefix='verify-submit') as submit_executor:
+        uids = submit_executor.map(
+            lambda address: submit_contract(
+                schain_name, address, get_verification_meta(verification_refs[address])
+            ),
+            to_submit
+        )
+        for verifying_address, uid in zip(to_submit, uids):
+            if uid == ALREADY_VERIFIED_RESULT:
+                logger.info(f'Contract {verifying_address} already verified')
+                set_contract_verified(schain_name, verifying_address)
+            elif uid:
+                pending[verifying_address] = {'uid': uid, 'submitted_at': monotonic()}
+    pending = poll_verify_statuses(schain_name, pending)
+    if pending:
+        logger.info(f'{len(pending)} contracts of {schain_name} are still pending, '
+                    f'will be checked next time')
+        with verifications_lock:
+            pending_verifications[schain_name] = pending
     all_verified = True
-    upd_config = get_schain_config(schain_name)
-    for verifying_address in verification_data.keys():
-        if not upd_config['verification_status'][verifying_address]:
+    verification_status = get_verification_status(schain_name)
+    for verifying_address in verification_refs.keys():
+        if not verification_status.get(verifying_address):
             logger.info(f'Contract {verifying_address} is not verified')
             all_verified = False
     if all_verified:
@@ -30,8 +117,35 @@ def verify(schain_name):
         set_chain_verified(schain_name)
 
 
-def verify_contract(schain_name, verifying_address, contract_meta):
-    logging.info(f'Verifying {verifying_address} contract')
+def reconcile_verification_status(schain_name, unverified):
+    """Marks contracts already verified on the explorer, returns the updated status"""
+    verified_list = get_verified_contract_list(schain_name)
+    if verified_list is None:
+        return get_verification_status(schain_name)
+    already_verified = unverified.intersection(verified_list)
+    if already_verified:
+        logger.info(f'{len(already_verified)} contracts of {schain_name} are already verified')
+        set_contracts_verified(schain_name, already_verified)
+    return get_verification_status(schain_name)
+
+
+def import_verification_status(schain_name, verification_refs, verification_status):
+    """Copies verified contracts from another explorer, the API is used for the rest"""
+    unverified = [
+        address for address in verification_refs.keys()
+        if not verification_status.get(address)
+    ]
+    if not unverified:
+        return verification_status
+    imported = import_verified_contracts(schain_name, unverified)
+    if not imported:
+        return verification_status
+    set_contracts_verified(schain_name, imported)
+    return get_verification_status(schain_name)
+
+
+def submit_contract(schain_name, verifying_address, contract_meta):
+    logging.info(f'Submitting {verifying_address} contract for verification')
     contract = {
         'contractaddress': verifying_address,
         'contractname': contract_meta['name'],
@@ -39,77 +153,86 @@ def verify_contract(schain_name, verifying_address, contract_meta):
         'sourceCode': json.dumps(contract_meta['input'])
     }
     response = send_verify_request(schain_name, contract)
-    if response and check_verify_status(schain_name, response['result']):
-        set_contract_verified(schain_name, verifying_address)
+    if response:
+        return response['result']
+
+
+def poll_verify_statuses(schain_name, pending):
+    """Polls all pending uids with exponential backoff, returns the ones left after deadline"""
+    pending = dict(pending)
+    deadline = monotonic() + VERIFICATION_DEADLINE
+    delay = VERIFICATION_POLL_DELAY
+    while pending:
+        for verifying_address, item in list(pending.items()):
+            result = get_verify_status(schain_name, item['uid'])
+            if result is None or result in PENDING_RESULTS:
+                continue
+            del pending[verifying_address]
+            if result == 'Pass - Verified':
+                logger.info(f'Contract {verifying_address} successfully verified')
+                set_contract_verified(schain_name, verifying_address)
+            elif result == 'Fail - Unable to verify':
+                logger.info(f'Failed to verify contract {verifying_address}')
+            elif result == UNKNOWN_UID_RESULT:
+                logger.info(f'Explorer lost verification of {verifying_address}, '
+                            f'it will be resubmitted')
+            else:
+                logger.info(f'Contract {verifying_address}: {result}')
+        remaining = deadline - monotonic()
+        if not pending or remaining <= 0:
+            break
+        logger.debug(f'{len(pending)} contracts are pending, next check in {delay}s...')
+        sleep(min(delay, remaining))
+        delay = min(delay * 2, VERIFICATION_MAX_POLL_DELAY)
+    return pending
 
 
 def get_verified_contract_list(schain_name):
+    """Returns addresses of all verified contracts, None if the explorer is unreachable"""
     schain_explorer_endpoint = get_explorer_endpoint(schain_name)
-    headers = {'content-type': 'application/json'}
     addresses = []
+    page = 1
     try:
-        result = requests.get(
-            f'{schain_explorer_endpoint}/api?module=contract&action=listcontracts&filter=verified',
-            headers=headers
-        ).json()['result']
-        addresses = [Web3.toChecksumAddress(contract['Address']) for contract in result]
-    except requests.exceptions.ConnectionError as e:
+        while True:
+            result = api_get(
+                schain_explorer_endpoint, module='contract', action='listcontracts',
+                filter='verified', page=page, offset=LIST_CONTRACTS_PAGE_SIZE
+            )['result']
+            addresses.extend(Web3.toChecksumAddress(contract['Address']) for contract in result)
+            if len(result) < LIST_CONTRACTS_PAGE_SIZE:
+                return addresses
+            page += 1
+    except (ExplorerApiError, KeyError, TypeError) as e:
         logger.warning(f'get_contract_list failed with {e}')
-    return addresses
-
-
-def get_veify_url(schain_name):
-    schain_explorer_endpoint = get_explorer_endpoint(schain_name)
-    return f'{schain_explorer_endpoint}/api?module=contract&action=verifysourcecode&codeformat=solidity-standard-json-input' # noqa
 
 
 def send_verify_request(schain_name, verification_data):
-    headers = {'content-type': 'application/json'}
+    schain_explorer_endpoint = get_explorer_endpoint(schain_name)
     try:
-        return requests.post(
-            get_veify_url(schain_name),
-            data=json.dumps(verification_data),
-            headers=headers
-        ).json()
-    except requests.exceptions.ConnectionError as e:
+        return api_post(
+            schain_explorer_endpoint, json.dumps(verification_data), module='contract',
+            action='verifysourcecode', codeformat='solidity-standard-json-input'
+        )
+    except ExplorerApiError as e:
         logger.warning(f'verifying_address failer with {e}')
 
 
 def is_contract_verified(schain_name, address):
     schain_explorer_endpoint = get_explorer_endpoint(schain_name)
-    headers = {'content-type': 'application/json'}
     try:
-        result = requests.get(
-            f'{schain_explorer_endpoint}/api?module=contract&action=getabi&address={address}',
-            headers=headers
-        ).json()['status']
+        result = api_get(
+            schain_explorer_endpoint, module='contract', action='getabi', address=address
+        )['status']
         return False if int(result) == 0 else True
-    except requests.exceptions.ConnectionError as e:
+    except ExplorerApiError as e:
         logger.warning(f'is_contract_verified failed with {e}')
 
 
-def check_verify_status(schain_name, uid):
-    if uid == 'Smart-contract already verified.':
-        logger.info('Contract already verified')
-        return True
+def get_verify_status(schain_name, uid):
     schain_explorer_endpoint = get_explorer_endpoint(schain_name)
-    headers = {'content-type': 'application/json'}
     try:
-        while True:
-            url = f'{schain_explorer_endpoint}/api?module=contract&action=checkverifystatus&guid={uid}' # noqa
-            response = requests.get(url, headers=headers).json()
-            if response['result'] == 'Pending in queue' or response['result'] == 'Unknown UID':
-                logger.debug(f'Verify status: {response["result"]}...')
-                sleep(10)
-            else:
-                if response['result'] == 'Pass - Verified':
-                    logger.info('Contract successfully verified')
-                    return True
-                elif response['result'] == 'Fail - Unable to verify':
-                    logger.info('Failed to verified contract')
-                else:
-                    logger.info(response['result'])
-                break
-    except requests.exceptions.ConnectionError as e:
+        return api_get(
+            schain_explorer_endpoint, module='contract', action='checkverifystatus', guid=uid
+        )['result']
+    except ExplorerApiError as e:
         logger.warning(f'checkverifystatus failed with {e}')
-    return False
@@ -0,0 +1,150 @@
+import datetime
+import gzip
+import json
+import os
+from decimal import Decimal
+from hashlib import sha256
+from struct import pack, unpack
+
+from psycopg2.extras import Json
+
+compact_format_magic = b"SKEXDUMP1\n"
+compact_manifest_file = "manifest.json"
+compress_level = 6
+json_types = ("json", "jsonb")
+
+
+def encode_value(value):
+    """Encodes a value with a one byte type tag, bytea and numeric are stored losslessly"""
+    if value is None:
+        return b"N"
+    if isinstance(value, bool):
+        return b"T" if value else b"F"
+    if isinstance(value, int) and -2 ** 63 <= value < 2 ** 63:
+        return b"i" + pack(">q", value)
+    if isinstance(value, (bytes, memoryview)):
+        raw = bytes(value)
+        return b"b" + pack(">I", len(raw)) + raw
+    if isinstance(value, (int, Decimal)):
+        raw = str(value).encode("ascii")
+        return b"d" + pack(">H", len(raw)) + raw
+    if isinstance(value, datetime.datetime):
+        raw = value.isoformat().encode("ascii")
+        return b"t" + pack(">B", len(raw)) + raw
+    if isinstance(value, datetime.date):
+        raw = value.isoformat().encode("ascii")
+        return b"D" + pack(">B", len(raw)) + raw
+    if isinstance(value, float):
+        return b"f" + pack(">d", value)
+    if isinstance(value, str):
+        raw = value.encode("utf-8")
+        return b"s" + pack(">I", len(raw)) + raw
+    if isinstance(value, list):
+        return b"a" + pack(">I", len(value)) + b"".join(map(encode_value, value))
+    return encode_json(value)
+
+
+def encode_json(value):
+    raw = json.dumps(value).encode("utf-8")
+    return b"j" + pack(">I", len(raw)) + raw
+
+
+def encode_row(row, types):
+    """json columns keep their own tag, so a jsonb list is not restored as an SQL array"""
+    return b"".join(
+        encode_json(value) if value is not None and column_type in json_types
+        else encode_value(value)
+        for value, column_type in zip(row, types)
+    )
+
+
+def decode_value(read):
+    tag = read(1)
+    if tag == b"N":
+        return None
+    if tag == b"T":
+        return True
+    if tag == b"F":
+        return False
+    if tag == b"i":
+        return unpack(">q", read(8))[0]
+    if tag == b"b":
+        return read(unpack(">I", read(4))[0])
+    if tag == b"d":
+        return Decimal(read(unpack(">H", read(2))[0]).decode("ascii"))
+    if tag == b"t":
+        return datetime.datetime.fromisoformat(read(unpack(">B", read(1))[0]).decode("ascii"))
+    if tag == b"D":
+        return datetime.date.fromisoformat(read(unpack(">B", read(1))[0]).decode("ascii"))
+    if tag == b"f":
+        return unpack(">d", read(8))[0]
+    if tag == b"s":
+        return read(unpack(">I", read(4))[0]).decode("utf-8")
+    if tag == b"a":
+        return [decode_value(read) for _ in range(unpack(">I", read(4))[0])]
+    if tag == b"j":
+        return Json(json.loads(read(unpack(">I", read(4))[0])))
+    raise ValueError(f"Unknown value tag {tag}")
+
+
+def write_compact_chunk(path, header, rows):
+    """Streams rows into a gzip file after a header, returns the chunk manifest entry"""
+    digest = sha256()
+    rows_count = 0
+    with gzip.open(path, "wb", compresslevel=compress_level) as f:
+        def write(data):
+            f.write(data)
+            digest.update(data)
+
+        raw_header = json.dumps(header).encode("utf-8")
+        write(compact_format_magic + pack(">I", len(raw_header)) + raw_header)
+        for row in rows:
+            write(b"R" + encode_row(row, header["types"]))
+            rows_count += 1
+        write(b"E" + pack(">I", rows_count))
+    return {"file": os.path.basename(path), "rows": rows_count, "sha256": digest.hexdigest()}
+
+
+def read_compact_chunk(path, chunk_meta):
+    """
+    Yields row dicts while decoding the chunk, raises after the last row
+    if its row count or checksum do not match the manifest
+    """
+    digest = sha256()
+    rows_count = 0
+    with gzip.open(path, "rb") as f:
+        def read(size):
+            data = f.read(size)
+            if len(data) != size:
+                raise ValueError(f"{path} is truncated")
+            digest.update(data)
+            return data
+
+        if read(len(compact_format_magic)) != compact_format_magic:
+            raise ValueError(f"{path} is not a compact dump")
+        columns = json.loads(read(unpack(">I", read(4))[0]))["columns"]
+        while True:
+            tag = read(1)
+            if tag == b"E":
+                break
+            if tag != b"R":
+                raise ValueError(f"{path} is corrupted")
+            yield dict(zip(columns, [decode_value(read) for _ in columns]))
+            rows_count += 1
+        written_rows_count = unpack(">I", read(4))[0]
+    if written_rows_count != rows_count or rows_count != chunk_meta["rows"] or \
+            digest.hexdigest() != chunk_meta["sha256"]:
+        raise ValueError(f"{path} does not match its manifest")
+
+
+def write_manifest(table_dir, schema, chunks):
+    with open(os.path.join(table_dir, compact_manifest_file), "w") as f:
+        json.dump({"schema": schema, "chunks": chunks}, f, indent=4)
+
+
+def read_manifest(table_dir):
+    manifest_path = os.path.join(table_dir, compact_manifest_file)
+    if not os.path.isfile(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
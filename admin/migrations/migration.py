@@ -4,17 +4,25 @@ import sys
 import re
 import time
 import shutil
-import datetime
+import itertools
 import psycopg2
 from psycopg2.extras import Json
 from decimal import Decimal
+from functools import partial
 from admin import DUMPS_DIR_PATH
 from admin.core.containers import get_db_port, check_db_running
 from admin.core.endpoints import get_all_names
+from admin.migrations.rows import (additional_columns_for_smart_contracts,
+                                   format_row, to_bytes, insert_rows, transform_smart_contracts,
+                                   transform_smart_contracts_additional_sources)
+from admin.migrations.compact_dump import (write_compact_chunk, read_compact_chunk,
+                                           write_manifest, read_manifest)
 
 psycopg2.extensions.register_adapter(dict, Json)
-datetime_format = '%Y-%m-%d %H:%M:%S.%f'
 chunk_size = 10000
+itersize = 1000
+copy_schema_file = "schema.json"
+restore_page_size = 1000
 
 db_params = {
     "host": "localhost",
@@ -22,16 +30,6 @@ db_params = {
     "database": "blockscout"
 }
 
-additional_columns_for_smart_contracts = {
-    "contract_code_md5": ""
-}
-
-
-def is_list_of_decimals(value):
-    if isinstance(value, list):
-        return all(isinstance(item, Decimal) for item in value)
-    return False
-
 
 def split_string(s):
     parts = re.split(r'(\d+)', s)
@@ -47,35 +45,75 @@ def get_latest_id(cursor, table_name):
     return latest_id
 
 
-def get_number_of_rows(cursor, table_name):
-    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-    row_count = cursor.fetchone()[0]
-    return row_count
+def get_estimated_number_of_rows(cursor, table_name):
+    cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", (table_name,))
+    row = cursor.fetchone()
+    return max(row[0], 0) if row else 0
+
+
+def stream_chunk(connection, table_info, last_key, chunk_state, row_format=None):
+    """Yields rows of one chunk fetched through a server-side cursor"""
+    table_name = table_info["table_name"]
+    order_by = table_info["order_by"]
+    descending = table_info.get("descending", False)
+    direction = "DESC" if descending else "ASC"
+    comparison = "<" if descending else ">"
+    order_sql = ', '.join(f"{key} {direction}" for key in order_by)
+    seek_sql = f"WHERE ({', '.join(order_by)}) {comparison} " \
+               f"({', '.join(['%s'] * len(order_by))})"
+    with connection.cursor(name=f"dump_{table_name}") as cursor:
+        cursor.itersize = itersize
+        cursor.execute(f"""
+            SELECT * FROM {table_name}
+            {seek_sql if last_key else ""}
+            ORDER BY {order_sql}
+            LIMIT {chunk_size};
+        """, last_key)
+        columns, key_indexes = None, None
+        for row in cursor:
+            if columns is None:
+                columns = [desc[0] for desc in cursor.description]
+                key_indexes = [columns.index(key) for key in order_by]
+            chunk_state["rows"] += 1
+            chunk_state["last_key"] = tuple(row[index] for index in key_indexes)
+            yield row_format(table_name, columns, row) if row_format else row
+    connection.commit()
 
 
-def paginate_query(cursor, sql_query, table_name):
-    current_page = 0
-    number_of_rows = get_number_of_rows(cursor, table_name)
+def paginate_query(connection, table_info, row_format=None):
+    """
+    Seeks chunks by the ordering key, so every chunk costs the same wherever it is.
+    Every chunk has to be consumed before the next one is requested.
+    """
+    table_name = table_info["table_name"]
+    with connection.cursor() as cursor:
+        number_of_rows = get_estimated_number_of_rows(cursor, table_name)
+    last_key = None
+    fetched_rows = 0
     while True:
-        paginated_query = sql_query + f"""
-            LIMIT {chunk_size}
-            OFFSET {current_page * chunk_size} + (
-                SELECT COUNT(*) FROM {table_name}
-            ) - {number_of_rows};
-        """
-        cursor.execute(paginated_query)
-        rows = cursor.fetchall()
-        if not rows:
+        chunk_state = {"rows": 0, "last_key": None}
+        yield stream_chunk(connection, table_info, last_key, chunk_state, row_format)
+        if not chunk_state["rows"]:
             break
-        yield rows
-        current_page += 1
-        completeness = round(chunk_size * current_page * 100 / number_of_rows, 1)
+        last_key = chunk_state["last_key"]
+        fetched_rows += chunk_state["rows"]
+        completeness = round(fetched_rows * 100 / number_of_rows, 1) if number_of_rows else 100
         completeness = completeness if completeness < 100 else 100
         print(f"Percentage complete: {completeness}" + " " * 5, end='\r')
         time.sleep(5)
     print()
 
 
+def write_rows(path, rows):
+    """Writes rows one by one as elements of a JSON array"""
+    with open(path, "w") as f:
+        f.write("[")
+        for index, row in enumerate(rows):
+            f.write(",\n" if index else "\n")
+            json.dump(row, f)
+        f.write("\n]\n")
+
+
 def migration_status_decorator(func):
     def wrapper(schain_name, table_name, *args, **kwargs):
         migration_status_file = os.path.join(DUMPS_DIR_PATH, schain_name, "migration_status.json")
@@ -94,7 +132,62 @@ def migration_status_decorator(func):
     return wrapper
 
 
-def dump(schain_name: str, tables_metadata: list):
+def get_table_schema(cursor, table_name):
+    cursor.execute("""
+        SELECT attname, format_type(atttypid, atttypmod)
+        FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum;
+    """, (table_name,))
+    return [{"name": name, "type": column_type} for name, column_type in cursor.fetchall()]
+
+
+def is_copy_dump(schain_name, table_name):
+    return os.path.isfile(os.path.join(DUMPS_DIR_PATH, schain_name, table_name, copy_schema_file))
+
+
+def dump_table_copy(connection, table_name, table_dir):
+    """Dumps the table as is with binary COPY next to the schema of its columns"""
+    started_at = time.monotonic()
+    with connection.cursor() as cursor:
+        with open(os.path.join(table_dir, copy_schema_file), "w") as f:
+            json.dump(get_table_schema(cursor, table_name), f, indent=4)
+        with open(os.path.join(table_dir, f"{table_name}.bin"), "wb") as f:
+            cursor.copy_expert(f"COPY {table_name} TO STDOUT (FORMAT binary)", f)
+    connection.commit()
+    print(f"Dumped with COPY in {time.monotonic() - started_at:.1f}s")
+
+
+def dump_table_compact(connection, table_info, table_dir):
+    table_name = table_info["table_name"]
+    with connection.cursor() as cursor:
+        schema = get_table_schema(cursor, table_name)
+    columns = [column["name"] for column in schema]
+    extra_columns = {}
+    if table_name == "smart_contracts":
+        extra_columns = {
+            key: value for key, value in additional_columns_for_smart_contracts.items()
+            if key not in columns
+        }
+    header = {
+        "columns": columns + list(extra_columns.keys()),
+        "types": [column["type"] for column in schema] + ["text"] * len(extra_columns)
+    }
+    extra_values = tuple(extra_columns.values())
+    chunks = []
+    for i, chunk in enumerate(paginate_query(connection, table_info)):
+        table_file = os.path.join(table_dir, f"{table_name}_{i+1}.rows.gz")
+        chunk_meta = write_compact_chunk(
+            table_file, header, (row + extra_values for row in chunk)
+        )
+        if chunk_meta["rows"]:
+            chunks.append(chunk_meta)
+        else:
+            os.remove(table_file)
+    write_manifest(table_dir, schema, chunks)
+
+
+def dump(schain_name: str, tables_metadata: list, copy=False, compact=False):
     schain_dump_dir = os.path.join(DUMPS_DIR_PATH, schain_name)
     os.makedirs(schain_dump_dir, exist_ok=True)
     db_params["port"] = get_db_port(schain_name)
@@ -106,43 +199,25 @@ def dump(schain_name: str, tables_metadata: list):
     cursor = connection.cursor()
     for table_info in tables_metadata:
         table_name = table_info["table_name"]
-        sql_query = table_info["sql_query"]
         table_dir = os.path.join(schain_dump_dir, table_name)
         if os.path.exists(table_dir):
             shutil.rmtree(table_dir)
         os.makedirs(table_dir)
-        number_of_rows = get_number_of_rows(cursor, table_name)
+        number_of_rows = get_estimated_number_of_rows(cursor, table_name)
         print(f"Table: {table_name}")
-        print(f"Number of rows: {number_of_rows}")
-        for i, rows in enumerate(paginate_query(cursor, sql_query, table_name)):
-            columns = [desc[0] for desc in cursor.description]
-            data = []
-            for row in rows:
-                formatted_data = []
-                for value in row:
-                    if isinstance(value, memoryview):
-                        formatted_data.append(value.hex())
-                    elif isinstance(value, datetime.datetime):
-                        formatted_data.append(value.strftime(datetime_format))
-                    elif isinstance(value, Decimal):
-                        formatted_data.append(float(value))
-                    elif is_list_of_decimals(value):
-                        formatted_data.append([float(item) for item in value])
-                    else:
-                        formatted_data.append(value)
-                data.append(dict(zip(columns, formatted_data)))
-
-            if (table_name == "smart_contracts"):
-                for item in data:
-                    if not all(
-                        key in item
-                        for key in additional_columns_for_smart_contracts.keys()
-                    ):
-                        item.update(additional_columns_for_smart_contracts)
-
+        print(f"Estimated number of rows: {number_of_rows}")
+        if copy and table_info.get("copy", True):
+            dump_table_copy(connection, table_name, table_dir)
+            continue
+        if compact:
+            dump_table_compact(connection, table_info, table_dir)
+            continue
+        for i, chunk in enumerate(paginate_query(connection, table_info, format_row)):
+            first_row = next(chunk, None)
+            if first_row is None:
+                continue
             table_file = os.path.join(table_dir, f"{table_name}_{i+1}.json")
-            with open(table_file, "w") as f:
-                json.dump(data, f, indent=4)
+            write_rows(table_file, itertools.chain([first_row], chunk))
 
     default_migration_status = {q["table_name"]: False for q in tables_metadata}
     migration_status_file = os.path.join(DUMPS_DIR_PATH, schain_name, "migration_status.json")
@@ -153,8 +228,38 @@ def dump(schain_name: str, tables_metadata: list):
     connection.close()
 
 
+def iterate_pages(rows, page_size):
+    """Groups a stream of rows into lists of at most page_size rows"""
+    rows = iter(rows)
+    while True:
+        page = list(itertools.islice(rows, page_size))
+        if not page:
+            return
+        yield page
+
+
+def read_json_chunk(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def get_table_chunks(table_dir_path):
+    """Returns chunk loaders of a compact dump described by its manifest or of a JSON dump"""
+    manifest = read_manifest(table_dir_path)
+    if manifest:
+        return [
+            partial(read_compact_chunk, os.path.join(table_dir_path, chunk["file"]), chunk)
+            for chunk in manifest["chunks"]
+        ]
+    table_files = sorted(os.listdir(table_dir_path), key=split_string)
+    return [
+        partial(read_json_chunk, os.path.join(table_dir_path, table_file))
+        for table_file in table_files
+    ]
+
+
 @migration_status_decorator
-def restore_table(schain_name, table_name, transform_func=None):
+def restore_table(schain_name, table_name, transform_func=None, pre_restore_sql=None):
     print(f"Table {table_name}:")
     db_params["port"] = get_db_port(schain_name)
     connection = psycopg2.connect(**db_params)
@@ -163,45 +268,30 @@ def restore_table(schain_name, table_name, transform_func=None):
     cursor.execute("BEGIN")
 
     table_dir_path = os.path.join(DUMPS_DIR_PATH, schain_name, table_name)
-    table_files = sorted(os.listdir(table_dir_path), key=split_string)
-    for index, table_file in enumerate(table_files):
-        table_file_dir = os.path.join(table_dir_path, table_file)
-        with open(table_file_dir, "r") as f:
-            table_data = json.load(f)
-
-        if not table_data:
-            print("Skipping, table is empty")
-            cursor.close()
-            connection.close()
-            return
-
-        if transform_func:
-            table_data = transform_func(table_data, cursor)
-            if not table_data:
-                print("Skipping, nothing to insert")
+    table_chunks = get_table_chunks(table_dir_path)
+    rows_count, insert_time = 0, 0
+    if pre_restore_sql:
+        cursor.execute(pre_restore_sql)
+    for index, load_chunk in enumerate(table_chunks):
+        for table_data in iterate_pages(load_chunk(), restore_page_size):
+            if transform_func:
+                table_data = transform_func(table_data, cursor)
+                if not table_data:
+                    continue
+            try:
+                insert_started_at = time.monotonic()
+                rows_count += insert_rows(
+                    cursor, table_name, table_data,
+                    on_conflict_sql(table_name, table_data[0].keys()), page_size=restore_page_size
+                )
+                insert_time += time.monotonic() - insert_started_at
+            except Exception as e:
+                connection.rollback()
                 cursor.close()
                 connection.close()
-                return
-
-        column_names = table_data[0].keys()
-        insert_query = f"""
-            INSERT INTO {table_name}
-            ({', '.join([
-                f'"{column_name}"' for column_name in column_names
-            ])})
-            VALUES ({', '.join(['%s'] * len(table_data[0]))})
-            {on_conflict_sql(table_name, column_names)}
-        """
-        values_to_insert = [tuple(row.values()) for row in table_data]
-        try:
-            cursor.executemany(insert_query, values_to_insert)
-        except Exception as e:
-            connection.rollback()
-            cursor.close()
-            connection.close()
-            print(f"Error: {e}")
-            exit()
-        completeness = round((index + 1) * 100 / len(table_files), 1)
+                print(f"Error: {e}")
+                exit()
+        completeness = round((index + 1) * 100 / len(table_chunks), 1)
         print(f"Percentage complete: {completeness}" + " " * 5, end='\r')
         time.sleep(5)
 
@@ -209,6 +299,74 @@ def restore_table(schain_name, table_name, transform_func=None):
     connection.commit()
     cursor.close()
     connection.close()
+    print_restore_rate(rows_count, insert_time)
+
+
+def print_restore_rate(rows_count, elapsed):
+    rate = round(rows_count / elapsed) if elapsed else rows_count
+    print(f"Restored {rows_count} rows in {elapsed:.1f}s ({rate} rows/sec)")
+
+
+def get_copy_select_list(table_name, source_schema, target_schema):
+    """Casts columns whose type changed, fills new columns, drops removed ones"""
+    source_types = {column["name"]: column["type"] for column in source_schema}
+    column_names, select_list, params = [], [], []
+    for column in target_schema:
+        column_name = column["name"]
+        if column_name in source_types:
+            expression = f'"{column_name}"'
+            if source_types[column_name] != column["type"]:
+                expression += f'::{column["type"]}'
+        elif table_name == "smart_contracts" and \
+                column_name in additional_columns_for_smart_contracts:
+            expression = "%s"
+            params.append(additional_columns_for_smart_contracts[column_name])
+        else:
+            continue
+        column_names.append(column_name)
+        select_list.append(expression)
+    return column_names, select_list, params
+
+
+@migration_status_decorator
+def restore_table_copy(schain_name, table_name):
+    print(f"Table {table_name}:")
+    started_at = time.monotonic()
+    table_dir_path = os.path.join(DUMPS_DIR_PATH, schain_name, table_name)
+    with open(os.path.join(table_dir_path, copy_schema_file)) as f:
+        source_schema = json.load(f)
+    db_params["port"] = get_db_port(schain_name)
+    connection = psycopg2.connect(**db_params)
+    cursor = connection.cursor()
+    staging_table = f"copy_{table_name}"
+    try:
+        cursor.execute(f"""
+            CREATE TEMP TABLE {staging_table}
+            ({', '.join(f'"{column["name"]}" {column["type"]}' for column in source_schema)})
+            ON COMMIT DROP;
+        """)
+        with open(os.path.join(table_dir_path, f"{table_name}.bin"), "rb") as f:
+            cursor.copy_expert(f"COPY {staging_table} FROM STDIN (FORMAT binary)", f)
+        column_names, select_list, params = get_copy_select_list(
+            table_name, source_schema, get_table_schema(cursor, table_name)
+        )
+        cursor.execute(f"""
+            INSERT INTO {table_name}
+            ({', '.join([f'"{column_name}"' for column_name in column_names])})
+            SELECT {', '.join(select_list)} FROM {staging_table}
+            {on_conflict_sql(table_name, column_names)}
+        """, params)
+        rows_count = cursor.rowcount
+    except Exception as e:
+        connection.rollback()
+        cursor.close()
+        connection.close()
+        print(f"Error: {e}")
+        exit()
+    connection.commit()
+    cursor.close()
+    connection.close()
+    print_restore_rate(rows_count, time.monotonic() - started_at)
 
 
 def on_conflict_sql(table_name, column_names):
@@ -245,28 +403,19 @@ def update_sequences(schain_name):
 
 def transform_addresses(table_data, cursor=None):
     for item in table_data:
-        item["hash"] = bytes.fromhex(item["hash"])
+        item["hash"] = to_bytes(item["hash"])
         if (item["contract_code"] is not None):
-            item["contract_code"] = bytes.fromhex(item["contract_code"])
+            item["contract_code"] = to_bytes(item["contract_code"])
         if (item["fetched_coin_balance"] is not None):
             item["fetched_coin_balance"] = Decimal(item["fetched_coin_balance"])
     return table_data
 
 
-def transform_smart_contracts(table_data, cursor=None):
-    for item in table_data:
-        item["address_hash"] = bytes.fromhex(item["address_hash"])
-        if item.get("implementation_address_hash") is not None:
-            item["implementation_address_hash"] = bytes.fromhex(item["implementation_address_hash"])
-        item["abi"] = json.dumps(item["abi"])
-    return table_data
-
-
 def transform_address_names(table_data, cursor):
     latest_id = get_latest_id(cursor, "address_names")
     transformed_data = []
     for item in table_data:
-        item["address_hash"] = bytes.fromhex(item["address_hash"])
+        item["address_hash"] = to_bytes(item["address_hash"])
         cursor.execute(
             "SELECT * FROM address_names WHERE address_hash = %s LIMIT 1",
             (item["address_hash"],)
@@ -279,22 +428,16 @@ def transform_address_names(table_data, cursor):
     return transformed_data
 
 
-def transform_smart_contracts_additional_sources(table_data, cursor=None):
-    for item in table_data:
-        item["address_hash"] = bytes.fromhex(item["address_hash"])
-    return table_data
-
-
 def transform_blocks(table_data, cursor=None):
     for item in table_data:
         item["difficulty"] = Decimal(item["difficulty"])
         item["gas_limit"] = Decimal(item["gas_limit"])
         item["gas_used"] = Decimal(item["gas_used"])
         item["total_difficulty"] = Decimal(item["total_difficulty"])
-        item["hash"] = bytes.fromhex(item["hash"])
-        item["miner_hash"] = bytes.fromhex(item["miner_hash"])
-        item["nonce"] = bytes.fromhex(item["nonce"])
-        item["parent_hash"] = bytes.fromhex(item["parent_hash"])
+        item["hash"] = to_bytes(item["hash"])
+        item["miner_hash"] = to_bytes(item["miner_hash"])
+        item["nonce"] = to_bytes(item["nonce"])
+        item["parent_hash"] = to_bytes(item["parent_hash"])
     return table_data
 
 
@@ -304,29 +447,29 @@ def transform_transactions(table_data, cursor=None):
         item["gas"] = Decimal(item["gas"])
         item["gas_price"] = Decimal(item["gas_price"])
         item["gas_used"] = Decimal(item["gas_used"])
-        item["hash"] = bytes.fromhex(item["hash"])
-        item["input"] = bytes.fromhex(item["input"])
+        item["hash"] = to_bytes(item["hash"])
+        item["input"] = to_bytes(item["input"])
         item["r"] = Decimal(item["r"])
         item["s"] = Decimal(item["s"])
         item["v"] = Decimal(item["v"])
         item["value"] = Decimal(item["value"])
-        item["block_hash"] = bytes.fromhex(item["block_hash"])
-        item["from_address_hash"] = bytes.fromhex(item["from_address_hash"])
+        item["block_hash"] = to_bytes(item["block_hash"])
+        item["from_address_hash"] = to_bytes(item["from_address_hash"])
         if item["to_address_hash"] is not None:
-            item["to_address_hash"] = bytes.fromhex(item["to_address_hash"])
+            item["to_address_hash"] = to_bytes(item["to_address_hash"])
         if item["created_contract_address_hash"] is not None:
-            item["created_contract_address_hash"] = bytes.fromhex(
+            item["created_contract_address_hash"] = to_bytes(
                 item["created_contract_address_hash"]
             )
         if item["old_block_hash"] is not None:
-            item["old_block_hash"] = bytes.fromhex(item["old_block_hash"])
+            item["old_block_hash"] = to_bytes(item["old_block_hash"])
     return table_data
 
 
 def transform_tokens(table_data, cursor=None):
     for item in table_data:
         del item["bridged"]
-        item["contract_address_hash"] = bytes.fromhex(item["contract_address_hash"])
+        item["contract_address_hash"] = to_bytes(item["contract_address_hash"])
         if item["total_supply"] is not None:
             item["total_supply"] = Decimal(item["total_supply"])
         if item["decimals"] is not None:
@@ -336,11 +479,11 @@ def transform_tokens(table_data, cursor=None):
 
 def transform_token_transfers(table_data, cursor=None):
     for item in table_data:
-        item["transaction_hash"] = bytes.fromhex(item["transaction_hash"])
-        item["from_address_hash"] = bytes.fromhex(item["from_address_hash"])
-        item["to_address_hash"] = bytes.fromhex(item["to_address_hash"])
-        item["token_contract_address_hash"] = bytes.fromhex(item["token_contract_address_hash"])
-        item["block_hash"] = bytes.fromhex(item["block_hash"])
+        item["transaction_hash"] = to_bytes(item["transaction_hash"])
+        item["from_address_hash"] = to_bytes(item["from_address_hash"])
+        item["to_address_hash"] = to_bytes(item["to_address_hash"])
+        item["token_contract_address_hash"] = to_bytes(item["token_contract_address_hash"])
+        item["block_hash"] = to_bytes(item["block_hash"])
         if item["amount"] is not None:
             item["amount"] = Decimal(item["amount"])
         if item["token_ids"] is not None:
@@ -348,11 +491,10 @@ def transform_token_transfers(table_data, cursor=None):
     return table_data
 
 
-def transform_address_current_token_balances(table_data, cursor):
-    cursor.execute("DELETE FROM address_current_token_balances")
+def transform_address_current_token_balances(table_data, cursor=None):
     for item in table_data:
-        item["address_hash"] = bytes.fromhex(item["address_hash"])
-        item["token_contract_address_hash"] = bytes.fromhex(item["token_contract_address_hash"])
+        item["address_hash"] = to_bytes(item["address_hash"])
+        item["token_contract_address_hash"] = to_bytes(item["token_contract_address_hash"])
         item["value"] = Decimal(item["value"])
         if item["old_value"] is not None:
             item["old_value"] = Decimal(item["old_value"])
@@ -364,60 +506,64 @@ def transform_address_current_token_balances(table_data, cursor):
 tables_metadata = [
     {
         "table_name": "addresses",
-        "sql_query": "SELECT * FROM addresses ORDER by hash",
+        "order_by": ["hash"],
         "transform_function": transform_addresses
     },
     {
         "table_name": "address_names",
-        "sql_query": "SELECT * FROM address_names ORDER by inserted_at",
-        "transform_function": transform_address_names
+        "order_by": ["id"],
+        "transform_function": transform_address_names,
+        "copy": False
     },
     {
         "table_name": "smart_contracts",
-        "sql_query": "SELECT * FROM smart_contracts ORDER BY id",
+        "order_by": ["id"],
         "transform_function": transform_smart_contracts
     },
     {
         "table_name": "smart_contracts_additional_sources",
-        "sql_query": "SELECT * FROM smart_contracts_additional_sources ORDER BY id",
+        "order_by": ["id"],
         "transform_function": transform_smart_contracts_additional_sources
     },
     {
         "table_name": "blocks",
-        "sql_query": "SELECT * FROM blocks ORDER BY number DESC",
+        "order_by": ["number", "hash"],
+        "descending": True,
         "transform_function": transform_blocks
     },
     {
         "table_name": "transactions",
-        "sql_query": "SELECT * FROM transactions ORDER BY hash",
+        "order_by": ["hash"],
         "transform_function": transform_transactions
     },
     {
         "table_name": "tokens",
-        "sql_query": "SELECT * FROM tokens ORDER by inserted_at",
+        "order_by": ["contract_address_hash"],
         "transform_function": transform_tokens
     },
     {
         "table_name": "token_transfers",
-        "sql_query": "SELECT * FROM token_transfers ORDER BY transaction_hash",
+        "order_by": ["transaction_hash", "block_hash", "log_index"],
         "transform_function": transform_token_transfers
     },
     {
         "table_name": "address_current_token_balances",
-        "sql_query": "SELECT * FROM address_current_token_balances ORDER BY id",
-        "transform_function": transform_address_current_token_balances
+        "order_by": ["id"],
+        "transform_function": transform_address_current_token_balances,
+        "pre_restore_sql": "DELETE FROM address_current_token_balances",
+        "copy": False
     }
 ]
 
 
-def dump_schains(only_contracts=False):
+def dump_schains(only_contracts=False, copy=False, compact=False):
     _tables_metadata = tables_metadata[:4] if only_contracts else tables_metadata
     schain_names = get_all_names()
     for schain_name in schain_names:
         if check_db_running(schain_name):
             print("-" * 50)
             print(f"Dumping schain: {schain_name}")
-            dump(schain_name, _tables_metadata)
+            dump(schain_name, _tables_metadata, copy=copy, compact=compact)
 
 
 def restore_schains(only_contracts=False):
@@ -428,21 +574,21 @@ def restore_schains(only_contracts=False):
             print("-" * 50)
             print(f"Restoring schain {schain_name}")
             for data in _tables_metadata:
-                restore_table(schain_name, data["table_name"], data["transform_function"])
+                if is_copy_dump(schain_name, data["table_name"]):
+                    restore_table_copy(schain_name, data["table_name"])
+                else:
+                    restore_table(schain_name, data["table_name"], data["transform_function"],
+                                  data.get("pre_restore_sql"))
             update_sequences(schain_name)
 
 
 def main():
+    options = sys.argv[2:]
     if sys.argv[1] == "dump":
-        if len(sys.argv) == 3 and sys.argv[2] == "contracts":
-            dump_schains(only_contracts=True)
-        else:
-            dump_schains()
+        dump_schains(only_contracts="contracts" in options, copy="copy" in options,
+                     compact="compact" in options)
     elif sys.argv[1] == "restore":
-        if len(sys.argv) == 3 and sys.argv[2] == "contracts":
-            restore_schains(only_contracts=True)
-        else:
-            restore_schains()
+        restore_schains(only_contracts="contracts" in options)
     else:
         print("Specify migration mode (dump or restore)")
 
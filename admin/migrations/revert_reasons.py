@@ -2,8 +2,8 @@ import logging
 
 import psycopg2
 from psycopg2.extras import execute_values
-from web3 import HTTPProvider, Web3
 from admin.configs.meta import set_schain_upgraded, get_schain_meta
+from admin.core.providers import get_web3
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +17,7 @@ def upgrade_revert_reasons(schain_name):
         user="postgres",
         port=schain_meta['db_port'])
 
-    provider = HTTPProvider(schain_meta['endpoint'])
-    web3 = Web3(provider)
+    web3 = get_web3(schain_meta['endpoint'])
     cursor = conn.cursor()
     limit_number = 1000
     select_query = f"""
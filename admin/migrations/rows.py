@@ -0,0 +1,87 @@
+import datetime
+import json
+from decimal import Decimal
+
+from psycopg2.extras import Json, execute_values
+
+datetime_format = '%Y-%m-%d %H:%M:%S.%f'
+
+additional_columns_for_smart_contracts = {
+    "contract_code_md5": ""
+}
+
+
+def is_list_of_decimals(value):
+    if isinstance(value, list):
+        return all(isinstance(item, Decimal) for item in value)
+    return False
+
+
+def format_value(value):
+    if isinstance(value, memoryview):
+        return value.hex()
+    elif isinstance(value, datetime.datetime):
+        return value.strftime(datetime_format)
+    elif isinstance(value, Decimal):
+        return float(value)
+    elif is_list_of_decimals(value):
+        return [float(item) for item in value]
+    return value
+
+
+def format_row(table_name, columns, row):
+    item = dict(zip(columns, map(format_value, row)))
+    if (table_name == "smart_contracts"):
+        if not all(
+            key in item
+            for key in additional_columns_for_smart_contracts.keys()
+        ):
+            item.update(additional_columns_for_smart_contracts)
+    return item
+
+
+def format_rows(table_name, columns, rows):
+    return [format_row(table_name, columns, row) for row in rows]
+
+
+def to_bytes(value):
+    return value if isinstance(value, bytes) else bytes.fromhex(value)
+
+
+def transform_smart_contracts(table_data, cursor=None):
+    for item in table_data:
+        item["address_hash"] = to_bytes(item["address_hash"])
+        if item.get("implementation_address_hash") is not None:
+            item["implementation_address_hash"] = to_bytes(item["implementation_address_hash"])
+        if not isinstance(item["abi"], Json):
+            item["abi"] = json.dumps(item["abi"])
+    return table_data
+
+
+def transform_smart_contracts_additional_sources(table_data, cursor=None):
+    for item in table_data:
+        item["address_hash"] = to_bytes(item["address_hash"])
+    return table_data
+
+
+def adapt_value(value):
+    return Json(value) if isinstance(value, dict) else value
+
+
+def insert_rows(cursor, table_name, table_data, conflict_sql="", columns=None, page_size=1000):
+    """Inserts row dicts with multi-row VALUES pages, returns the number of rows sent"""
+    column_names = [
+        column_name for column_name in table_data[0].keys()
+        if columns is None or column_name in columns
+    ]
+    insert_query = f"""
+        INSERT INTO {table_name}
+        ({', '.join([f'"{column_name}"' for column_name in column_names])})
+        VALUES %s
+        {conflict_sql}
+    """
+    execute_values(cursor, insert_query, [
+        tuple(adapt_value(row[column_name]) for column_name in column_names)
+        for row in table_data
+    ], page_size=page_size)
+    return len(table_data)
@@ -0,0 +1,110 @@
+import logging
+
+import psycopg2
+from web3 import Web3
+
+from admin.configs.meta import get_explorers_meta, get_schain_meta
+from admin.core.containers import check_db_running
+from admin.migrations.rows import (format_rows, insert_rows, transform_smart_contracts,
+                                   transform_smart_contracts_additional_sources)
+
+logger = logging.getLogger(__name__)
+
+EXCLUDED_COLUMNS = ('id',)
+
+
+def connect(schain_name):
+    return psycopg2.connect(
+        host="localhost",
+        database="explorer",
+        user="postgres",
+        port=get_schain_meta(schain_name)['db_port'])
+
+
+def get_reference_schain(schain_name):
+    """Returns an explorer with all predeployed contracts verified to copy them from"""
+    for reference_name, reference_meta in get_explorers_meta().items():
+        if reference_name != schain_name and reference_meta['contracts_verified'] and \
+                check_db_running(reference_name):
+            return reference_name
+
+
+def get_code_hashes(cursor, address_hashes):
+    cursor.execute(
+        "SELECT hash, md5(contract_code) FROM addresses "
+        "WHERE hash = ANY(%s) AND contract_code IS NOT NULL",
+        (address_hashes,)
+    )
+    return {bytes(address_hash): code_md5 for address_hash, code_md5 in cursor.fetchall()}
+
+
+def get_table_columns(cursor, table_name):
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = %s",
+        (table_name,)
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def select_rows(cursor, table_name, address_hashes):
+    cursor.execute(f"SELECT * FROM {table_name} WHERE address_hash = ANY(%s)", (address_hashes,))
+    columns = [desc[0] for desc in cursor.description]
+    return format_rows(table_name, columns, cursor.fetchall())
+
+
+def insert_missing_rows(cursor, table_name, table_data):
+    target_columns = get_table_columns(cursor, table_name) - set(EXCLUDED_COLUMNS)
+    insert_rows(cursor, table_name, table_data, "ON CONFLICT DO NOTHING", columns=target_columns)
+
+
+def import_verified_contracts(schain_name, addresses):
+    """
+    Copies verified sources of contracts with the same code from a reference explorer,
+    returns addresses of imported contracts
+    """
+    reference_name = get_reference_schain(schain_name)
+    if not reference_name:
+        return []
+    logger.info(f'Importing verified contracts for {schain_name} from {reference_name}')
+    address_hashes = [bytes.fromhex(address[2:]) for address in addresses]
+    imported = []
+    source = connect(reference_name)
+    target = connect(schain_name)
+    try:
+        with source.cursor() as source_cursor, target.cursor() as target_cursor:
+            source_codes = get_code_hashes(source_cursor, address_hashes)
+            target_codes = get_code_hashes(target_cursor, address_hashes)
+            matched_hashes = [
+                address_hash for address_hash, code_md5 in target_codes.items()
+                if source_codes.get(address_hash) == code_md5
+            ]
+            if not matched_hashes:
+                return []
+            smart_contracts = select_rows(source_cursor, 'smart_contracts', matched_hashes)
+            if not smart_contracts:
+                return []
+            for item in smart_contracts:
+                item['contract_code_md5'] = source_codes[bytes.fromhex(item['address_hash'])]
+            imported = [
+                Web3.toChecksumAddress(f'0x{item["address_hash"]}') for item in smart_contracts
+            ]
+            additional_sources = select_rows(
+                source_cursor, 'smart_contracts_additional_sources', matched_hashes
+            )
+            insert_missing_rows(target_cursor, 'smart_contracts',
+                                transform_smart_contracts(smart_contracts))
+            if additional_sources:
+                insert_missing_rows(
+                    target_cursor, 'smart_contracts_additional_sources',
+                    transform_smart_contracts_additional_sources(additional_sources)
+                )
+        target.commit()
+    except psycopg2.Error as e:
+        target.rollback()
+        logger.warning(f'Importing verified contracts for {schain_name} failed with {e}')
+        return []
+    finally:
+        source.close()
+        target.close()
+    logger.info(f'Imported {len(imported)} verified contracts for {schain_name}')
+    return imported
@@ -1,5 +1,6 @@
 import json
 import logging
+import os
 from admin import ZERO_ADDRESS
 
 logger = logging.getLogger(__name__)
@@ -19,3 +20,13 @@ def read_json(path, mode='r'):
 def write_json(path, content):
     with open(path, 'w') as outfile:
         json.dump(content, outfile, indent=4)
+
+
+def write_json_atomic(path, content):
+    """Writes to a temp file, fsyncs and renames it so readers never see a partial file"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as outfile:
+        json.dump(content, outfile, indent=4)
+        outfile.flush()
+        os.fsync(outfile.fileno())
+    os.replace(tmp_path, path)